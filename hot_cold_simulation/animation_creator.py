@@ -4,6 +4,7 @@ from typing import Any, List
 # Third Party Imports
 import geopandas as gpd  # type: ignore
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.animation import FuncAnimation, PillowWriter
 from matplotlib.artist import Artist
 
@@ -57,6 +58,7 @@ simulator = MonteCarloSimulation(
     cache_type=cache_type,
     param=param,
     prepopulate_cache=True,
+    record_history=True,
 )
 logger.info("Simulation Initialized with the following parameters\n")
 logger.info(f"Cache Type: {cache_type}")
@@ -76,7 +78,7 @@ logger.info("Simulation Complete")
 def animate(i: Any) -> List[Artist]:
     """Generate each animation frame."""
     ax.clear()
-    hot_layer_indices = [int(idx) for idx in history[i]]
+    hot_layer_indices = np.flatnonzero(history[i]).tolist()
     hot_layer_gdf = usa_landsat.loc[hot_layer_indices]
     hot_layer_gdf.set_crs(usa_landsat.crs)
     usa_states_plot = usa_states.plot(ax=ax, color="blue", edgecolor="black")
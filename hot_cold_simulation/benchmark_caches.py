@@ -0,0 +1,101 @@
+import argparse
+import textwrap
+import time
+
+import numpy as np
+from modules.config import MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.defaults import DEFAULT_BACKEND  # type: ignore
+from modules.logger_config import setup_logger  # type: ignore
+from modules.sweep import run_sweep  # type: ignore
+
+logger = setup_logger(MONTE_CARLO_LOG_DIR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="benchmark-caches",
+        add_help=True,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """\
+    Description: Compare cache types on the free requests of identical workloads.
+
+    Every cache type replays the same seeded requests and prepopulated scenes (common
+    random numbers) for each capacity and weights, so the differences between cache
+    types are not sampling noise of the workloads.
+    """
+        ),
+    )
+    parser.add_argument(
+        "--cache-types",
+        type=str,
+        nargs="+",
+        default=["LRUCache", "FootprintCache"],
+        help="Cache types compared",
+    )
+    parser.add_argument(
+        "--capacities",
+        type=int,
+        nargs="+",
+        default=[50, 100, 200, 400],
+        help="Cache capacities in scenes",
+    )
+    parser.add_argument(
+        "--weights",
+        type=str,
+        nargs="+",
+        default=["0.1,0.3,0.6", "0.33,0.33,0.34", "0.6,0.3,0.1"],
+        help="Regions, states and counties weights, comma separated",
+    )
+    parser.add_argument("--num-requests", type=int, default=100)
+    parser.add_argument("--num-runs", type=int, default=32)
+    parser.add_argument(
+        "--no-prepopulate", action="store_true", help="Start with empty caches"
+    )
+    parser.add_argument("--workload", type=str, default="uniform")
+    parser.add_argument("--backend", type=str, default=DEFAULT_BACKEND)
+    parser.add_argument("--seed", type=int, default=2024)
+
+    args = parser.parse_args()
+    weights_list = [[float(w) for w in weights.split(",")] for weights in args.weights]
+
+    init_time = time.time()
+    results = {}
+    for cache_type in args.cache_types:
+        start_time = time.time()
+        results[cache_type] = run_sweep(
+            args.num_requests,
+            weights_list,
+            cache_type,
+            args.capacities,
+            args.num_runs,
+            prepopulate_cache=not args.no_prepopulate,
+            return_type="requests",
+            backend=args.backend,
+            workload=args.workload,
+            seed=args.seed,
+            common_random_numbers=True,
+        )
+        logger.info(f"{cache_type} simulated in {time.time() - start_time:.2f} seconds")
+
+    baseline = args.cache_types[0]
+    logger.info(f"Mean free requests of {args.num_requests} requests")
+    for param_idx, capacity in enumerate(args.capacities):
+        for weights_idx, weights in enumerate(args.weights):
+            line = f"capacity {capacity:4d}, weights {weights}:"
+            for cache_type in args.cache_types:
+                values = results[cache_type][param_idx, weights_idx]
+                line += f" {cache_type} {values.mean():7.2f}"
+                if cache_type != baseline:
+                    # Paired runs, so the error of the difference is small
+                    diff = values - results[baseline][param_idx, weights_idx]
+                    error = (
+                        diff.std(ddof=1) / np.sqrt(len(diff)) if len(diff) > 1 else 0
+                    )
+                    line += f" ({diff.mean():+.2f} +/- {error:.2f})"
+            logger.info(line)
+    logger.info(f"Benchmark completed in {(time.time() - init_time):.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
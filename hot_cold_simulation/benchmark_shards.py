@@ -0,0 +1,77 @@
+import argparse
+import textwrap
+import time
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES  # type: ignore
+from modules.config import MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.jit import NUMBA_AVAILABLE  # type: ignore
+from modules.logger_config import setup_logger  # type: ignore
+from modules.scenario import load_scenario_data  # type: ignore
+from modules.shards import estimate_miss_ratio_curve  # type: ignore
+from modules.stack_distance import replay_lru_capacities  # type: ignore
+from modules.workload import generate_requests  # type: ignore
+
+logger = setup_logger(MONTE_CARLO_LOG_DIR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="benchmark-shards",
+        add_help=True,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """\
+    Description: Time the sampled (SHARDS) LRU miss-ratio curve against the exact one.
+
+    Both curves cover every capacity from 1 to 886 scenes for the same seeded stream,
+    and the mean absolute error of the estimate is reported with the timings.
+    """
+        ),
+    )
+    parser.add_argument(
+        "--weights",
+        type=str,
+        nargs="+",
+        default=["0.05,0.15,0.8", "0.3,0.4,0.3", "0.8,0.15,0.05"],
+        help="Regions, states and counties weights, comma separated",
+    )
+    parser.add_argument("--num-requests", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=0.1)
+    parser.add_argument("--num-salts", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=2024)
+
+    args = parser.parse_args()
+    scenario = load_scenario_data()
+    capacities = np.arange(1, NUM_SCENES + 1)
+    compiled = "Numba kernel" if NUMBA_AVAILABLE else "NumPy"
+    logger.info(f"Miss-ratio curves of {args.num_requests} requests ({compiled})")
+    for weights in args.weights:
+        scales, features = generate_requests(
+            np.random.default_rng(args.seed),
+            [float(w) for w in weights.split(",")],
+            scenario.feature_counts,
+            args.num_requests,
+        )
+        start_time = time.perf_counter()
+        estimate = estimate_miss_ratio_curve(
+            scenario.footprints,
+            scales,
+            features,
+            capacities,
+            rate=args.rate,
+            num_salts=args.num_salts,
+        )
+        sampled_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        exact = replay_lru_capacities(scenario.footprints, scales, features, capacities)
+        exact_time = time.perf_counter() - start_time
+        error = np.abs(estimate["miss_ratio"] - (1 - exact["ratio"])).mean()
+        logger.info(
+            f"weights {weights}: SHARDS {sampled_time:.2f} s, exact {exact_time:.2f} s"
+            f" ({exact_time / sampled_time:.1f}x), mean abs error {error:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
-from typing import Any
-
 import geopandas as gpd  # type: ignore
 from modules import db_connect  # type: ignore
 from modules.config import DATA_DIR  # type: ignore
+from modules.db_mappings import write_mappings  # type: ignore
+from modules.footprint_builder import build_footprint_mappings  # type: ignore
 
 ### Data Import
 usa_states_path = DATA_DIR / "USA_States" / "usa_states.shp"
@@ -22,64 +22,15 @@ usa_landsat = gpd.read_file(usa_landsat_path)
 usa_landsat = usa_landsat.set_geometry("geometry")
 
 
-def create_mapping_table_with_list(conn: Any, table_name: str) -> None:
-    cursor = conn.cursor()
-    # """Create a mapping table with given name."""
-    cursor.execute(
-        f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
-        feature_index INTEGER PRIMARY KEY,
-        landsat_FIDs TEXT
-    );
-    """
-    )
-    conn.commit()
-
-
-def populate_table_with_list_mappings_using_index(
-    gdf: gpd.GeoDataFrame, landsat_gdf: gpd.GeoDataFrame, table_name: str
-) -> None:
-    """Populate the mapping table using dataframe indices.
-
-
-    Args:
-        gdf (gpd.GeoDataFrame): _description_
-        landsat_gdf (gpd.GeoDataFrame): _description_
-        table_name (str): _description_
-    """
-    mappings = []
-
-    for idx, row in gdf.iterrows():
-        intersecting_landsat = landsat_gdf[
-            landsat_gdf.geometry.intersects(row.geometry)
-        ]
-        landsat_indices = intersecting_landsat.index.to_list()  # type: ignore
-        landsat_indices_str = ",".join(map(str, landsat_indices))
-        mappings.append((idx, landsat_indices_str))
-
-    with db_connect.connect() as conn:
-        cursor = conn.cursor()
-        cursor.executemany(
-            f"""
-        INSERT INTO {table_name} (feature_index, landsat_FIDs) VALUES (%s, %s) ON CONFLICT DO NOTHING
-        """,
-            mappings,
-        )
-        conn.commit()
-
+# Step 1: Map every layer to the Landsat scenes in a single spatial join
+mappings = build_footprint_mappings(
+    {"regions": usa_regions, "states": usa_states, "counties": usa_counties},
+    usa_landsat,
+)
 
-# Step 1: Connect to the PostgreSQL database and create the tables
+# Step 2: Create and bulk load the PostgreSQL tables in one transaction
 conn = db_connect.connect()
-create_mapping_table_with_list(conn, "regions_mapping")
-create_mapping_table_with_list(conn, "states_mapping")
-create_mapping_table_with_list(conn, "counties_mapping")
-conn.close()
-
-# Step 2: Populate the PostgreSQL tables
-populate_table_with_list_mappings_using_index(
-    usa_regions, usa_landsat, "regions_mapping"
-)
-populate_table_with_list_mappings_using_index(usa_states, usa_landsat, "states_mapping")
-populate_table_with_list_mappings_using_index(
-    usa_counties, usa_landsat, "counties_mapping"
+write_mappings(
+    conn, {f"{scale}_mapping": mapping for scale, mapping in mappings.items()}
 )
+conn.close()
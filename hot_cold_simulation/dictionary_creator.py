@@ -1,9 +1,12 @@
 import pickle
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict
 
 import geopandas as gpd  # type: ignore
 from modules.config import DATA_DIR  # type: ignore
+from modules.footprint_builder import build_footprint_mappings  # type: ignore
+from modules.footprint_index import FootprintIndex  # type: ignore
+from modules.scenario import FOOTPRINTS_DIR  # type: ignore
 
 ### Data Import
 # usa_states_path = DATA_DIR / "USA_States" / "usa_states.shp"
@@ -26,42 +29,41 @@ current_dir = Path.cwd()
 data_dicts = (Path(current_dir) / "dictionaries").resolve()
 
 
-def create_mapping_dictionary(
-    gdf: gpd.GeoDataFrame, landsat_gdf: gpd.GeoDataFrame
-) -> Dict[int, List[int]]:
-    """Create a mapping dictionary using dataframe indices."""
-    mapping_dict = {}
-
-    for idx, row in gdf.iterrows():
-        intersecting_landsat = landsat_gdf[
-            landsat_gdf.geometry.intersects(row.geometry)
-        ]
-        landsat_indices = intersecting_landsat.index.to_list()  # type: ignore
-        mapping_dict[idx] = landsat_indices
-
-    return mapping_dict
-
-
 def save_dict_to_file(data_dict: Dict, filename: str) -> None:
     """Save dictionary to a file."""
     with Path.open(data_dicts / filename, "wb") as f:
         pickle.dump(data_dict, f)
 
 
+def save_footprint_index(data_dict: Dict, scale: str) -> None:
+    """Save dictionary as a memory-mappable CSR footprint index."""
+    FootprintIndex.from_mapping(data_dict).save(data_dicts / FOOTPRINTS_DIR, scale)
+
+
 def load_dict_from_file(filename: str) -> Dict:
     """Load dictionary from a file."""
     with Path.open(data_dicts / filename, "rb") as f:
         return pickle.load(f)
 
 
-# Create mapping dictionaries
-divisions_mapping = create_mapping_dictionary(usa_divisions, usa_landsat)
-# states_mapping = create_mapping_dictionary(usa_states, usa_landsat)
-# counties_mapping = create_mapping_dictionary(usa_counties, usa_landsat)
-# divisions_mapping = create_mapping_dictionary(usa_divisions, usa_landsat)
+# Create mapping dictionaries for every layer in a single spatial join
+mappings = build_footprint_mappings(
+    {
+        "regions": usa_divisions,
+        # "states": usa_states,
+        # "counties": usa_counties,
+    },
+    usa_landsat,
+)
+divisions_mapping = mappings["regions"]
+# states_mapping = mappings["states"]
+# counties_mapping = mappings["counties"]
 
 # Save dictionaries to files
 save_dict_to_file(divisions_mapping, "divisions_mapping.pkl")
+save_footprint_index(divisions_mapping, "regions")
 # save_dict_to_file(states_mapping, "states_mapping.pkl")
 # save_dict_to_file(counties_mapping, "counties_mapping.pkl")
+# save_footprint_index(states_mapping, "states")
+# save_footprint_index(counties_mapping, "counties")
 # save_dict_to_file(divisions_mapping, "divisions_mapping.pkl")
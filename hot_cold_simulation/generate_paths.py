@@ -0,0 +1,58 @@
+import argparse
+import textwrap
+import time
+
+from modules.config import MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.logger_config import setup_logger  # type: ignore
+from modules.probability_paths import PATH_NAMES, generate_missing_paths  # type: ignore
+from modules.scenario import load_scenario_data  # type: ignore
+
+logger = setup_logger(MONTE_CARLO_LOG_DIR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="generate-paths",
+        add_help=True,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """\
+    Description: Prepare the probability paths of the 'paths' workload once.
+
+    Every scale without `stochastic_paths/<scale>_{probabilities,cdf}.npy` is converted
+    from its `<scale>_stochastic.csv`, or generated from the stochastic workload when
+    there is no CSV, which needs the libpysal extra. Existing paths are kept, so every
+    simulation run reads the same paths.
+    """
+        ),
+    )
+    parser.add_argument(
+        "--scales",
+        type=str,
+        nargs="+",
+        choices=PATH_NAMES,
+        default=list(PATH_NAMES),
+        help="Scales to prepare",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed of the generated paths"
+    )
+    parser.add_argument(
+        "--path-dir", type=str, default=None, help="Directory of the paths"
+    )
+
+    args = parser.parse_args()
+
+    init_time = time.time()
+    written = generate_missing_paths(
+        tuple(load_scenario_data().feature_counts),
+        seed=args.seed,
+        path_dir=args.path_dir,
+        scales=[PATH_NAMES.index(name) for name in args.scales],
+    )
+    logger.info(f"Prepared paths: {', '.join(written) or 'none missing'}")
+    logger.info(f"Paths prepared in {(time.time() - init_time):.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,22 @@ from pathlib import Path
 
 import dotenv
 import numpy as np
-import pandas as pd  # type: ignore
 
 # Third-party imports
 import plotly.graph_objects as go  # type: ignore
+from modules.cache_registry import get_cache_policy  # type: ignore
 from modules.config import CONFIG_DIR, MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.defaults import DEFAULT_BACKEND  # type: ignore
 from modules.linear_combinations import linear_combinations  # type: ignore
 from modules.logger_config import setup_logger  # type: ignore
+from modules.result_store import ResultStore  # type: ignore
 
 # Custom imports
-from modules.simulator import MonteCarloSimulation  # type: ignore
+from modules.sweep import (  # type: ignore
+    make_evaluator,
+    search_cells,
+    stored_sweep_settings,
+)
 
 current_dir = Path.cwd()
 monte_carlo_results_dir = (Path(current_dir) / MONTE_CARLO_LOG_DIR).resolve()  # type: ignore
@@ -35,6 +41,14 @@ def run_analysis() -> None:
         num_runs,
         prepopulate_cache,
         return_type,
+        backend,
+        engine,
+        workload,
+        search_mode,
+        simulation_budget,
+        step_size,
+        replicates,
+        streams,
     ) = load_environment_variables()
 
     simulator_results = run_simulation(
@@ -46,6 +60,14 @@ def run_analysis() -> None:
         num_runs,
         prepopulate_cache,
         return_type=return_type,
+        backend=backend,
+        engine=engine,
+        workload=workload,
+        search_mode=search_mode,
+        simulation_budget=simulation_budget,
+        step_size=step_size,
+        replicates=replicates,
+        streams=streams,
     )
 
     logger.info(f"Analysis completed in {(time.time() - init_time):.2f} seconds")
@@ -61,16 +83,47 @@ def load_environment_variables():
     num_runs = int(getenv("num_runs"))  # type: ignore
     prepopulate_cache = bool(getenv("prepopulate_cache"))  # type: ignore
     return_type = str(getenv("return_type"))  # type: ignore
+    backend = str(getenv("backend", DEFAULT_BACKEND))
+    engine = str(getenv("engine", "python"))
+    # 'stochastic' draws the features of each scale from moving spatial hotspots,
+    # 'paths' from the precomputed probability paths in stochastic_paths
+    workload = str(getenv("workload", "uniform"))
+    search_mode = str(getenv("search_mode", "grid"))
+    simulation_budget = int(getenv("simulation_budget", "2000"))
+    # A positive ci_width adds runs per cell in batches, up to num_runs, until the
+    # confidence interval of its mean is that narrow or it can't be the optimum
+    replicates = {
+        "ci_width": float(getenv("ci_width", "0")),
+        "min_runs": int(getenv("min_runs", "8")),
+        "batch_runs": int(getenv("batch_runs", "8")),
+    }
+    # Seeding of the run streams; with common random numbers run r replays the same
+    # requests and prepopulation in every cell
+    seed = str(getenv("seed", ""))
+    streams = {
+        "seed": int(seed) if seed else None,
+        "common_random_numbers": str(getenv("common_random_numbers", "False")).lower()
+        == "true",
+    }
+    # LRU capacity sweeps can replay each run once for every capacity
+    stack_distance = str(getenv("stack_distance", "False")).lower() == "true"
+    if stack_distance and cache_type not in ("LRUCache", "ArrayLRUCache"):
+        raise ValueError("stack_distance requires 'LRUCache' or 'ArrayLRUCache'.")
+    if stack_distance and replicates["ci_width"] > 0:
+        raise ValueError("stack_distance can't be combined with a positive ci_width.")
+    streams["stack_distance"] = stack_distance
 
     weights_list = list(linear_combinations(step_size))
     init_time = time.time()
 
-    if cache_type == "LRUCache":
+    # Capacities start at one increment, expiration times at 50 puts
+    if get_cache_policy(cache_type).param_kind == "capacity":
         param_list = list(range(cache_param_increment, 800, cache_param_increment))
-    elif cache_type == "TimeCache":
-        param_list = list(range(50, 800, cache_param_increment))
     else:
-        raise ValueError("Invalid cache type. Use 'LRUCache' or 'TimeCache'.")
+        param_list = list(range(50, 800, cache_param_increment))
+
+    if search_mode not in ("grid", "adaptive"):
+        raise ValueError("Invalid search mode. Use 'grid' or 'adaptive'.")
 
     total_params = len(param_list)
     logger.info("Analysis Initialized with the following parameters\n")
@@ -78,6 +131,15 @@ def load_environment_variables():
     logger.info(f"Feature Scale Weights Step Size: {step_size}")
     logger.info(f"Number of Requests per Simulation: {num_requests}")
     logger.info(f"Parameter list {param_list}")
+    logger.info(f"Simulation backend: {backend}")
+    logger.info(f"Simulation engine: {engine}")
+    logger.info(f"Request workload: {workload}")
+    logger.info(f"Weight search mode: {search_mode}")
+    if search_mode == "adaptive":
+        logger.info(f"Simulation budget per constraint: {simulation_budget}")
+    if replicates["ci_width"] > 0:
+        logger.info(f"Sequential replicates: {replicates}")
+    logger.info(f"Random streams: {streams}")
     logger.info("------------------------------------------\n")
 
     return (
@@ -90,6 +152,14 @@ def load_environment_variables():
         num_runs,
         prepopulate_cache,
         return_type,
+        backend,
+        engine,
+        workload,
+        search_mode,
+        simulation_budget,
+        step_size,
+        replicates,
+        streams,
     )
 
 
@@ -129,41 +199,85 @@ def run_simulation(
     num_runs,
     prepopulate_cache,
     return_type,
+    backend=DEFAULT_BACKEND,
+    engine="python",
+    workload="uniform",
+    search_mode="grid",
+    simulation_budget=0,
+    step_size=0.1,
+    replicates=None,
+    streams=None,
 ):
-    simulator_results = {}
-    for idx, param in enumerate(param_list, start=1):
-        start_time = time.time()
-        weight_results = {}
-        logger.info(f"Starting constraint analysis {idx} of {total_params}")
-        for ijx, weights in enumerate(weights_list, start=1):
-            wstart_time = time.time()
-            # if __name__ == "__main__":
-            simulator = MonteCarloSimulation(
-                num=num_requests,
-                weights=weights,
-                cache_type=cache_type,
-                param=param,
-                prepopulate_cache=prepopulate_cache,
-                return_type=return_type,
-            )
-            results = simulator.monte_carlo_simulation(num_runs)
-            total_free_requests = sum(results)
-            average_free_requests = total_free_requests / num_runs
-            weight_results[tuple(weights)] = average_free_requests
-
-            logger.info(
-                f"      Weight Analysis {ijx} completed in {(time.time() - wstart_time):.2f} seconds"
-            )
+    start_time = time.time()
+    # Completed cells are checkpointed so an interrupted sweep resumes where it died
+    store = ResultStore(
+        Path(monte_carlo_results_dir / "sweep_results.sqlite"),
+        stored_sweep_settings(
+            num_requests,
+            cache_type,
+            num_runs,
+            prepopulate_cache,
+            return_type,
+            workload=workload,
+            replicates=replicates,
+            streams=streams,
+        ),
+    )
+    # Every (param, weights, run) cell runs on one shared pool, skipping stored cells
+    evaluate = make_evaluator(
+        store,
+        {
+            "num_requests": num_requests,
+            "cache_type": cache_type,
+            "prepopulate_cache": prepopulate_cache,
+            "return_type": return_type,
+            "backend": backend,
+            "engine": engine,
+            "workload": workload,
+        },
+        num_runs,
+        replicates=replicates,
+        streams=streams,
+    )
 
-        optimal_weights, max_free_requests = calculate_results(weight_results)
+    if search_mode == "grid":
         logger.info(
-            f"Constraint simulation {idx} completed in {(time.time() - start_time):.2f} seconds"
+            f"Starting sweep of {total_params} constraints x {len(weights_list)} weights"
+            f" x {num_runs} runs"
         )
+    else:
+        logger.info(
+            f"Starting adaptive search of {total_params} constraints with a budget of"
+            f" {simulation_budget} simulations each"
+        )
+    weight_results_list = search_cells(
+        evaluate,
+        param_list,
+        weights_list,
+        num_runs,
+        search_mode=search_mode,
+        simulation_budget=simulation_budget,
+        step_size=step_size,
+    )
+    logger.info(f"Sweep completed in {(time.time() - start_time):.2f} seconds")
+
+    simulator_results = {}
+    cells = []
+    for idx, param in enumerate(param_list):
+        weight_results = weight_results_list[idx]
+        cells.extend((param, weights) for weights in weight_results)
+        optimal_weights, max_free_requests = calculate_results(weight_results)
+        logger.info(f"Constraint simulation {idx + 1} of {total_params}: {param}")
+        logger.info(f"Simulated weights: {len(weight_results)}")
         logger.info(f"Optimal weights are: {optimal_weights}")
         logger.info(f"Maximum free requests are: {max_free_requests}")
         logger.info("------------------------------------------\n")
         simulator_results[param] = [optimal_weights, max_free_requests]
 
+    stored = store.load()
+    logger.info(f"Simulation runs used: {sum(len(stored[cell]) for cell in cells)}")
+    save_weight_results(store, cells)
+    store.close()
     return simulator_results
 
 
@@ -249,13 +363,12 @@ def plot_weight_results(simulator_results):
     fig.show()
 
 
-def save_weight_results(simulator_results):
-    df = pd.DataFrame(
-        list(simulator_results.items()), columns=["Weights", "Average Free Requests"]
-    )
+def save_weight_results(store, cells=None):
+    # One row per (param, weights) cell summarizing its stored runs
+    df = store.to_frame(cells)
     results_csv_path = Path(monte_carlo_results_dir / "results.csv")
     df.to_csv(results_csv_path, index=False)
 
 
-
-run_analysis()
+if __name__ == "__main__":
+    run_analysis()
@@ -0,0 +1,110 @@
+import random
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+
+
+class ARCCache:
+    """Adaptive Replacement Cache (Megiddo and Modha) over scene IDs.
+
+    Cached scenes seen once since they entered the cache are in `t1`, scenes seen
+    again in `t2`, both in LRU order. The ghost lists `b1` and `b2` remember the
+    scenes recently evicted from each, and a hit in a ghost list moves the target
+    size `p` of `t1` towards the list that would have kept the scene. Every operation
+    is O(1). As in the other caches, `get` only looks up and `put` is the reference.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+        num_scenes: int = NUM_SCENES,
+    ):
+        self.capacity = capacity
+        self.rng = rng
+        self.num_scenes = num_scenes
+        self.p = 0
+        self.t1: "OrderedDict[int, None]" = OrderedDict()
+        self.t2: "OrderedDict[int, None]" = OrderedDict()
+        self.b1: "OrderedDict[int, None]" = OrderedDict()
+        self.b2: "OrderedDict[int, None]" = OrderedDict()
+        if prepopulate:
+            self.prepopulate_cache()
+
+    def get(self, key: int) -> int:
+        if key in self.t1 or key in self.t2:
+            return key
+        else:
+            return -1
+
+    def put(self, keys: List[int]) -> None:
+        for key in keys:
+            self.reference(key)
+
+    def reference(self, key: int) -> None:
+        """Apply one reference to `key`."""
+        if self.capacity <= 0:
+            return
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+            return
+        if key in self.t2:
+            self.t2.move_to_end(key)
+            return
+
+        if key in self.b1:
+            self.p = min(self.capacity, self.p + max(len(self.b2) // len(self.b1), 1))
+            self.replace(in_b2=False)
+            del self.b1[key]
+            self.t2[key] = None
+            return
+        if key in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
+            self.replace(in_b2=True)
+            del self.b2[key]
+            self.t2[key] = None
+            return
+
+        # Miss in the cache and in the ghost lists
+        if len(self.t1) + len(self.b1) == self.capacity:
+            if len(self.t1) < self.capacity:
+                self.b1.popitem(last=False)
+                self.replace(in_b2=False)
+            else:
+                self.t1.popitem(last=False)
+        else:
+            total = len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2)
+            if total >= self.capacity:
+                if total == 2 * self.capacity:
+                    self.b2.popitem(last=False)
+                self.replace(in_b2=False)
+        self.t1[key] = None
+
+    def replace(self, in_b2: bool) -> None:
+        """Evict the LRU scene of `t1` or `t2` into its ghost list if the cache is full."""
+        if len(self.t1) + len(self.t2) < self.capacity:
+            return
+        if self.t1 and (
+            not self.t2 or len(self.t1) > self.p or (in_b2 and len(self.t1) == self.p)
+        ):
+            key, _ = self.t1.popitem(last=False)
+            self.b1[key] = None
+        else:
+            key, _ = self.t2.popitem(last=False)
+            self.b2[key] = None
+
+    def prepopulate_cache(self) -> None:
+        # The scenes of `LRUCache.prepopulate_cache`, seen once
+        if self.rng is not None:
+            keys = self.rng.permutation(self.num_scenes)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(self.num_scenes), self.capacity)
+        for key in keys:
+            self.t1[key] = None
+
+    def current_state(self) -> list[Any]:
+        return list(self.t1.keys()) + list(self.t2.keys())
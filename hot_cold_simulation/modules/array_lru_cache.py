@@ -0,0 +1,98 @@
+import random
+from typing import Any, List, Optional
+
+import numpy as np
+
+NUM_SCENES = 886
+
+
+class ArrayLRUCache:
+    """LRU cache over the dense Landsat scene key space backed by flat arrays.
+
+    Membership is a flag per scene and the recency order is a circular doubly linked
+    list over the scene IDs, as in the `compiled_engine` kernels, whose extra node
+    `num_scenes` sits between the least and the most recently used scene. `get` is a
+    single lookup, and every key of a `put` unlinks and appends one node, so a `put`
+    costs O(batch) whatever the capacity. The arrays are Python lists, which index
+    faster than NumPy arrays from Python code. A `put` follows the eviction rule of
+    `LRUCache` exactly, including evicting the least recently used scene when the
+    cache is full and the incoming scene is already cached, so both classes produce
+    the same hit/miss sequence for the same stream.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+        num_scenes: int = NUM_SCENES,
+    ):
+        self.capacity = capacity
+        self.rng = rng
+        self.num_scenes = num_scenes
+        self.load_order([])
+        if prepopulate:
+            self.prepopulate_cache()
+
+    def get(self, key: int) -> int:
+        if not self.member[key]:
+            return -1
+        else:
+            return key
+
+    def put(self, keys: List[int]) -> None:
+        member, prev, nxt = self.member, self.prev, self.nxt
+        head = self.num_scenes
+        size = self.size
+        for key in keys:
+            # Evict the least recently used scene, the one after the head node
+            if size >= self.capacity and size > 0:
+                lru = nxt[head]
+                nxt[head] = nxt[lru]
+                prev[nxt[lru]] = head
+                member[lru] = False
+                size -= 1
+            if member[key]:
+                nxt[prev[key]] = nxt[key]
+                prev[nxt[key]] = prev[key]
+            else:
+                member[key] = True
+                size += 1
+            # Append the key as the most recently used scene, before the head node
+            mru = prev[head]
+            nxt[mru] = key
+            prev[key] = mru
+            nxt[key] = head
+            prev[head] = key
+        self.size = size
+
+    def load_order(self, keys: List[int]) -> None:
+        """Replace the cache contents with `keys`, ordered from least to most recent."""
+        chain = [self.num_scenes, *(int(key) for key in keys), self.num_scenes]
+        self.member = [False] * self.num_scenes
+        self.prev = [self.num_scenes] * (self.num_scenes + 1)
+        self.nxt = [self.num_scenes] * (self.num_scenes + 1)
+        for before, key in zip(chain[:-1], chain[1:]):
+            self.nxt[before] = key
+            self.prev[key] = before
+        for key in chain[1:-1]:
+            self.member[key] = True
+        self.size = len(chain) - 2
+
+    def prepopulate_cache(self) -> None:
+        # A prefix of one permutation inserted in reverse, so for every capacity the
+        # first scene is the most recent and the recency stacks of smaller caches nest
+        # in those of larger ones
+        if self.rng is not None:
+            keys = self.rng.permutation(self.num_scenes)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(self.num_scenes), self.capacity)
+        self.load_order(keys)
+
+    def current_state(self) -> list[Any]:
+        cached = []
+        key = self.nxt[self.num_scenes]
+        while key != self.num_scenes:
+            cached.append(key)
+            key = self.nxt[key]
+        return cached
@@ -0,0 +1,132 @@
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+from modules.compiled_engine import COMBINATION, TTL, CompiledEngine
+
+# Padding slot of the scene axis, used for empty stack entries and padded requests.
+PAD = NUM_SCENES
+
+
+class BatchedEngine(CompiledEngine):
+    """Advances the caches of every run of a batch in lockstep with NumPy.
+
+    The state of all runs is held in (runs x scenes) arrays and every request is
+    applied to all runs at once, so the Python loop runs once per request instead of
+    once per request and run. LRU caches use the recency stack argument of
+    `replay_lru_capacities`, here across runs instead of capacities: a cache always
+    holds the `size` most recent scenes of its stack, and once a put finds the cache
+    `capacity - 1` full its size after the put only depends on the depth of the last
+    inserted scene. Only the top `capacity` entries of each stack can be cached, so
+    they are kept in a (runs x capacity) array, and every deeper scene gets the rank
+    `capacity`. Combination caches expire from the least recent end, which only
+    shrinks `size`, and TTL caches only need the expiry epoch of each scene.
+    """
+
+    def replay_requests(self, requests: np.ndarray, orders: np.ndarray) -> np.ndarray:
+        """Replay flat request indices shaped (runs, num) in lockstep.
+
+        Args:
+            requests (np.ndarray): Flat request indices of each run.
+            orders (np.ndarray): Prepopulated scenes of each run, least recent first.
+
+        Returns:
+            np.ndarray: Free requests, free scenes and total scenes of each run.
+        """
+        num_runs, num = requests.shape
+        rows = np.arange(num_runs)[:, None]
+        capacity = max(self.capacity, 1)
+        ttl = max(self.expiration_time, 1)
+        depth = np.arange(capacity)
+
+        # Top of the recency stack of each run (most recent first), the rank of every
+        # scene in it, and the number of cached scenes at its top.
+        top = np.full((num_runs, capacity), PAD, dtype=np.int64)
+        rank = np.full((num_runs, NUM_SCENES + 1), capacity, dtype=np.int64)
+        expiry = np.zeros((num_runs, NUM_SCENES + 1), dtype=np.int64)
+        prepopulated = orders.shape[1]
+        top[:, :prepopulated] = orders[:, ::-1]
+        rank[rows, orders] = np.arange(prepopulated)[::-1]
+        expiry[rows, orders] = ttl
+        size = np.full(num_runs, prepopulated, dtype=np.int64)
+        epoch = 0
+
+        metrics = np.zeros((num_runs, 3), dtype=np.int64)
+        for i in range(num):
+            lengths = self.lengths[requests[:, i]]
+            width = int(lengths.max())
+            position = np.arange(width)
+            valid = position < lengths[:, None]
+            keys = np.where(
+                valid,
+                self.scenes[
+                    np.where(valid, self.starts[requests[:, i]][:, None] + position, 0)
+                ],
+                PAD,
+            )
+
+            # Every scene is looked up before the request is put, as in `run_simulation`.
+            if self.policy == TTL:
+                hits = np.count_nonzero(valid & (expiry[rows, keys] > epoch), axis=1)
+            else:
+                key_rank = rank[rows, keys]
+                hits = np.count_nonzero(valid & (key_rank < size[:, None]), axis=1)
+            metrics[:, 0] += hits == lengths
+            metrics[:, 1] += hits
+            metrics[:, 2] += lengths
+
+            epoch += 1
+            if self.policy == TTL:
+                expiry[rows, keys] = epoch + ttl
+                continue
+            if self.policy == COMBINATION:
+                # Expiry decreases down the stack, so the unexpired scenes are a prefix.
+                unexpired = np.count_nonzero(expiry[rows, top] > epoch, axis=1)
+                size = np.minimum(size, unexpired)
+            if width == 0:
+                continue
+
+            # Size after the put, from the scenes inserted before the last one and the
+            # depth of the last one once keys deeper than it have moved above it.
+            key_rank = np.where(valid, key_rank, -1)
+            last = np.maximum(lengths - 1, 0)
+            last_rank = key_rank[rows[:, 0], last]
+            before = valid & (position < last[:, None])
+            new = valid & (key_rank >= size[:, None])
+            last_rank += np.count_nonzero(
+                before & (key_rank > last_rank[:, None]), axis=1
+            )
+            saturated = size + np.count_nonzero(before & new, axis=1) >= capacity - 1
+            size = np.where(
+                lengths == 0,
+                size,
+                np.where(
+                    saturated,
+                    capacity - 1 + (last_rank >= capacity - 1),
+                    size + np.count_nonzero(new, axis=1),
+                ),
+            )
+
+            # The keys move to the top of the stack in reverse put order, and every
+            # other entry moves down by the number of keys that were below it.
+            is_key = np.zeros((num_runs, capacity + 1), dtype=np.int64)
+            is_key[rows, np.where(valid, np.minimum(key_rank, capacity), capacity)] = 1
+            is_key = is_key[:, :capacity]
+            moved = np.where(
+                is_key == 1,
+                capacity + width,
+                depth + lengths[:, None] - np.cumsum(is_key, axis=1),
+            )
+            shifted = np.full((num_runs, capacity + width + 1), PAD, dtype=np.int64)
+            shifted[rows, moved] = top
+            shifted[
+                rows, np.where(valid, last[:, None] - position, capacity + width)
+            ] = keys
+
+            rank[rows, top] = capacity
+            top = shifted[:, :capacity]
+            rank[rows, top] = depth
+            rank[:, PAD] = capacity
+            if self.policy == COMBINATION:
+                expiry[rows, keys] = epoch + ttl
+                expiry[:, PAD] = 0
+
+        return metrics
@@ -0,0 +1,116 @@
+import heapq
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+
+# Next use of a scene that is never requested again.
+NEVER = np.iinfo(np.int64).max
+
+
+class BeladyCache:
+    """Offline optimal (Belady / OPT) cache that knows the whole request stream.
+
+    `plan` hands the cache the footprints of the requests it is about to receive, in
+    order, and `put` must then be called once per planned request. When the cache is
+    full, a scene is cached only if its next request comes before that of the cached
+    scene requested furthest in the future, which is then evicted. This maximizes the
+    free scenes of the stream for the capacity, so it bounds what an online policy can
+    reach. The scene requested furthest ahead is kept at the top of a max-heap whose
+    stale entries are skipped, so a reference is O(log n).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+        num_scenes: int = NUM_SCENES,
+    ):
+        self.capacity = capacity
+        self.rng = rng
+        self.num_scenes = num_scenes
+        self.next_use: Dict[int, int] = {}
+        self.heap: List[Any] = []
+        self.plans: List[np.ndarray] = []
+        self.position = 0
+        if prepopulate:
+            self.prepopulate_cache()
+
+    def plan(self, footprints: Sequence[Sequence[int]]) -> None:
+        """Set the footprints of the coming requests, one per later `put`.
+
+        Args:
+            footprints (Sequence[Sequence[int]]): Scene IDs of every coming request.
+        """
+        # Request of the next use of every scene of every request, from the end
+        upcoming = np.full(self.num_scenes, NEVER, dtype=np.int64)
+        plans: List[np.ndarray] = [np.empty(0, dtype=np.int64)] * len(footprints)
+        for i in range(len(footprints) - 1, -1, -1):
+            scenes = np.asarray(footprints[i], dtype=np.int64)
+            plans[i] = upcoming[scenes]
+            upcoming[scenes] = i
+        self.plans = plans
+        self.position = 0
+
+        self.heap = []
+        for key in self.next_use:
+            self.set_next_use(key, int(upcoming[key]))
+
+    def set_next_use(self, key: int, next_use: int) -> None:
+        """Cache `key` until its next use, the request index `next_use`."""
+        self.next_use[key] = next_use
+        heapq.heappush(self.heap, (-next_use, key))
+
+    def furthest(self) -> Any:
+        """Return the next use and the cached scene requested furthest ahead."""
+        while True:
+            next_use, key = self.heap[0]
+            if self.next_use.get(key) == -next_use:
+                return -next_use, key
+            heapq.heappop(self.heap)
+
+    def get(self, key: int) -> int:
+        if key not in self.next_use:
+            return -1
+        else:
+            return key
+
+    def put(self, keys: List[int]) -> None:
+        if self.position >= len(self.plans):
+            raise ValueError("BeladyCache needs the request stream, call `plan` first.")
+        uses = self.plans[self.position].tolist()
+        self.position += 1
+        # Cached scenes of the request first move to their next use, so they aren't
+        # evicted for a scene needed sooner than their stale next use suggests
+        for key, next_use in zip(keys, uses):
+            if key in self.next_use:
+                self.set_next_use(key, next_use)
+        for key, next_use in zip(keys, uses):
+            if key in self.next_use:
+                continue
+            elif len(self.next_use) < self.capacity:
+                self.set_next_use(key, next_use)
+            elif self.capacity > 0:
+                furthest_use, furthest_key = self.furthest()
+                if next_use < furthest_use:
+                    heapq.heappop(self.heap)
+                    del self.next_use[furthest_key]
+                    self.set_next_use(key, next_use)
+        # Keep the heap from growing with stale entries
+        if len(self.heap) > 4 * max(self.capacity, 16):
+            self.heap = [(-use, key) for key, use in self.next_use.items()]
+            heapq.heapify(self.heap)
+
+    def prepopulate_cache(self) -> None:
+        # The scenes of `LRUCache.prepopulate_cache`, their next uses come with `plan`
+        if self.rng is not None:
+            keys = self.rng.permutation(self.num_scenes)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(self.num_scenes), self.capacity)
+        for key in keys:
+            self.set_next_use(key, NEVER)
+
+    def current_state(self) -> list[Any]:
+        return list(self.next_use.keys())
@@ -0,0 +1,123 @@
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from modules.arc_cache import ARCCache
+from modules.array_lru_cache import ArrayLRUCache
+from modules.belady_cache import BeladyCache
+from modules.combination_cache import CombinationCache
+from modules.footprint_cache import FootprintCache
+from modules.lfu_cache import LFUCache
+from modules.lru_cache import LRUCache  # type: ignore
+from modules.time_cache import TimeCache
+from modules.two_queue_cache import TwoQueueCache
+
+# Entry point group third-party packages register their cache policies under.
+ENTRY_POINT_GROUP = "hot_cold_simulation.cache_policies"
+
+# Meaning of the cache parameter: a capacity in scenes or an expiration time in puts.
+PARAM_KINDS = ("capacity", "expiration")
+
+
+class CachePolicy(NamedTuple):
+    """A cache type the simulator can build.
+
+    `factory(param, prepopulate, rng)` returns a new cache with the `get`, `put` and
+    `current_state` methods of `LRUCache`.
+    """
+
+    factory: Callable[[Any, bool, Optional[np.random.Generator]], Any]
+    param_kind: str = "capacity"
+
+
+_REGISTRY: Dict[str, CachePolicy] = {}
+
+_ENTRY_POINTS_LOADED = False
+
+
+def register_cache(
+    name: str,
+    factory: Callable[[Any, bool, Optional[np.random.Generator]], Any],
+    param_kind: str = "capacity",
+) -> None:
+    """Register a cache type under `name`, replacing any earlier one.
+
+    Args:
+        name (str): Name used as `cache_type`.
+        factory (Callable): Builds a cache from the parameter, whether to prepopulate
+            it and the prepopulation generator.
+        param_kind (str, optional): 'capacity' or 'expiration'. Defaults to
+            'capacity'.
+    """
+    if param_kind not in PARAM_KINDS:
+        raise ValueError(f"Invalid parameter kind. Use one of {PARAM_KINDS}.")
+    _REGISTRY[name] = CachePolicy(factory, param_kind)
+
+
+def load_entry_points() -> None:
+    """Register the cache policies of the `ENTRY_POINT_GROUP` entry points once.
+
+    An entry point named after the cache type loads either a `CachePolicy` or a
+    capacity-based factory.
+    """
+    global _ENTRY_POINTS_LOADED
+    if _ENTRY_POINTS_LOADED:
+        return
+    _ENTRY_POINTS_LOADED = True
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        policy = entry_point.load()
+        if isinstance(policy, CachePolicy):
+            register_cache(entry_point.name, policy.factory, policy.param_kind)
+        else:
+            register_cache(entry_point.name, policy)
+
+
+def cache_types() -> List[str]:
+    """Return the names of every registered cache type."""
+    load_entry_points()
+    return list(_REGISTRY)
+
+
+def get_cache_policy(name: str) -> CachePolicy:
+    """Return the registered cache type `name`.
+
+    Raises:
+        ValueError: If no cache type of that name is registered.
+    """
+    if name not in _REGISTRY:
+        load_entry_points()
+    if name not in _REGISTRY:
+        raise ValueError(f"Invalid cache type. Use one of {cache_types()}.")
+    return _REGISTRY[name]
+
+
+def create_cache(
+    name: str,
+    param: Any,
+    prepopulate: bool = False,
+    rng: Optional[np.random.Generator] = None,
+) -> Any:
+    """Build a new cache of the registered type `name`."""
+    return get_cache_policy(name).factory(param, prepopulate, rng)
+
+
+for cache_class in (
+    LRUCache,
+    ArrayLRUCache,
+    FootprintCache,
+    ARCCache,
+    TwoQueueCache,
+    LFUCache,
+    BeladyCache,
+):
+    register_cache(cache_class.__name__, cache_class)
+register_cache(
+    "CombinationCache",
+    lambda param, prepopulate, rng: CombinationCache(
+        param, prepopulate=prepopulate, rng=rng
+    ),
+)
+# `TimeCache` has no capacity and ignores prepopulation
+register_cache(
+    "TimeCache", lambda param, prepopulate, rng: TimeCache(param), "expiration"
+)
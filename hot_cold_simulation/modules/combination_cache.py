@@ -1,16 +1,33 @@
 # type: ignore
 import random
-import threading
 from collections import OrderedDict
-from typing import Any, List
+from typing import Any, List, Optional
+
+import numpy as np
 
 
 class CombinationCache:
-    def __init__(self, capacity: int, expiration_time=10, prepopulate=False):
+    """LRU cache of fixed capacity whose entries also expire after a number of puts.
+
+    Entries store the epoch at which they expire. Since every put gives its keys the
+    same time to live and moves them to the most recent end, the recency order of the
+    `OrderedDict` is also the expiry order. Expired entries are therefore always at the
+    least recently used end, and both expiry and capacity eviction pop from that end in
+    amortized O(1) per scene. Each simulation run owns its cache, so no lock is taken.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        expiration_time=10,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+    ):
         self.cache = OrderedDict()
         self.capacity = capacity
         self.expiration_time = expiration_time
-        self.lock = threading.Lock()
+        self.rng = rng
+        self.epoch = 0
         if prepopulate:
             self.prepopulate_cache()
 
@@ -21,33 +38,33 @@ class CombinationCache:
             return self.cache[key][0]
 
     def put(self, keys: List[int]) -> None:
-        with self.lock:
-            # Update the counter of existing items
-            keys_to_delete = []
-            for k, (value, count) in self.cache.items():
-                if count <= 1:
-                    keys_to_delete.append(k)
-                else:
-                    self.cache[k] = (value, count - 1)
-
-            # Remove items whose counter has reached zero
-            for k in keys_to_delete:
-                del self.cache[k]
-
-            for key in keys:
-                # Check if the cache is already full
-                if len(self.cache) >= self.capacity:
-                    # Remove the least recently used item from the cache
-                    self.cache.popitem(last=False)
-
-                # Put the new items in the cache with a counter of expiration_time
-                self.cache[key] = (key, self.expiration_time)
-                self.cache.move_to_end(key)
+        self.epoch += 1
+
+        # Remove items whose counter has reached zero
+        while self.cache and next(iter(self.cache.values()))[1] <= self.epoch:
+            self.cache.popitem(last=False)
+
+        expiry = self.epoch + max(self.expiration_time, 1)
+        for key in keys:
+            # Check if the cache is already full
+            if len(self.cache) >= self.capacity:
+                # Remove the least recently used item from the cache
+                self.cache.popitem(last=False)
+
+            # Put the new items in the cache with an expiry expiration_time epochs ahead
+            self.cache[key] = (key, expiry)
+            self.cache.move_to_end(key)
 
     def prepopulate_cache(self) -> None:
-        keys = random.sample(range(886), self.capacity)
+        # A prefix of one permutation inserted in reverse, so for every capacity the
+        # first scene is the most recent and the recency stacks of smaller caches nest
+        # in those of larger ones
+        if self.rng is not None:
+            keys = self.rng.permutation(886)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(886), self.capacity)
         for key in keys:
-            self.cache[key] = (key, self.expiration_time)
+            self.cache[key] = (key, max(self.expiration_time, 1))
 
     def current_state(self) -> list[Any]:
         return list(self.cache.keys())
@@ -0,0 +1,334 @@
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+from modules.footprint_index import FootprintIndex
+from modules.jit import njit
+from modules.shards import RequestStream
+from modules.workload import draw_seeded_runs, run_streams
+
+# Cache policies of the kernels.
+LRU = 0
+TTL = 1
+COMBINATION = 2
+
+POLICIES = {
+    "LRUCache": LRU,
+    "ArrayLRUCache": LRU,
+    "TimeCache": TTL,
+    "CombinationCache": COMBINATION,
+}
+
+# Expiration time `create_cache` gives a `CombinationCache`.
+COMBINATION_EXPIRATION = 10
+
+# End of the recency list.
+NIL = -1
+
+
+@njit(cache=True)
+def _unlink(key, prev, nxt, ends):
+    """Remove `key` from the recency list; `ends` holds its (LRU, MRU) ends."""
+    if prev[key] == NIL:
+        ends[0] = nxt[key]
+    else:
+        nxt[prev[key]] = nxt[key]
+    if nxt[key] == NIL:
+        ends[1] = prev[key]
+    else:
+        prev[nxt[key]] = prev[key]
+    prev[key] = NIL
+    nxt[key] = NIL
+
+
+@njit(cache=True)
+def _append(key, prev, nxt, ends):
+    """Insert `key` at the most recent end of the recency list."""
+    prev[key] = ends[1]
+    nxt[key] = NIL
+    if ends[1] == NIL:
+        ends[0] = key
+    else:
+        nxt[ends[1]] = key
+    ends[1] = key
+
+
+@njit(cache=True)
+def _count_hits(start, stop, scenes, policy, member, expiry, epoch):
+    """Return how many scenes of a request are cached before it is put."""
+    hits = 0
+    for i in range(start, stop):
+        if policy == TTL:
+            hits += expiry[scenes[i]] > epoch
+        else:
+            hits += member[scenes[i]]
+    return hits
+
+
+@njit(cache=True)
+def _expire(epoch, member, expiry, prev, nxt, ends):
+    """Drop expired scenes from the least recent end; return how many were dropped."""
+    expired = 0
+    while ends[0] != NIL and expiry[ends[0]] <= epoch:
+        member[ends[0]] = False
+        _unlink(ends[0], prev, nxt, ends)
+        expired += 1
+    return expired
+
+
+@njit(cache=True)
+def _put_ttl(start, stop, scenes, expiry, expires_at):
+    """Put the scenes of a request into a `TTL` cache."""
+    for i in range(start, stop):
+        expiry[scenes[i]] = expires_at
+
+
+@njit(cache=True)
+def _put_lru(
+    start, stop, scenes, capacity, size, expires_at, member, expiry, prev, nxt, ends
+):
+    """Put the scenes of a request into a bounded cache; return its new size."""
+    for i in range(start, stop):
+        key = scenes[i]
+        if size >= capacity and size > 0:
+            member[ends[0]] = False
+            size -= 1
+            _unlink(ends[0], prev, nxt, ends)
+        if member[key]:
+            _unlink(key, prev, nxt, ends)
+        else:
+            member[key] = True
+            size += 1
+        expiry[key] = expires_at
+        _append(key, prev, nxt, ends)
+    return size
+
+
+@njit(cache=True)
+def replay_run(
+    starts, lengths, scenes, requests, policy, capacity, expiration_time, order
+):
+    """Replay the requests of one run against a cache held in integer arrays.
+
+    The recency order is a doubly linked list over the scene IDs and every scene has
+    an expiry epoch. The policies follow the Python caches put for put: `LRU` evicts
+    the least recently used scene whenever the cache is full, even if the incoming
+    scene is already cached, `TTL` drops scenes `expiration_time` puts after their
+    last put, and `COMBINATION` does both, expiring from the least recent end first.
+
+    Args:
+        starts (np.ndarray): First position in `scenes` of each flat request.
+        lengths (np.ndarray): Number of scenes of each flat request.
+        scenes (np.ndarray): Scene IDs of all requests.
+        requests (np.ndarray): Flat request indices of the run.
+        policy (int): One of `LRU`, `TTL` or `COMBINATION`.
+        capacity (int): Capacity of `LRU` and `COMBINATION` caches.
+        expiration_time (int): Number of puts a `TTL` or `COMBINATION` entry lives.
+        order (np.ndarray): Prepopulated scenes, least recent first.
+
+    Returns:
+        np.ndarray: Free requests, free scenes and total scenes of the run.
+    """
+    prev = np.full(NUM_SCENES, NIL, dtype=np.int64)
+    nxt = np.full(NUM_SCENES, NIL, dtype=np.int64)
+    ends = np.full(2, NIL, dtype=np.int64)
+    member = np.zeros(NUM_SCENES, dtype=np.bool_)
+    expiry = np.zeros(NUM_SCENES, dtype=np.int64)
+    ttl = max(expiration_time, 1)
+    size = 0
+    epoch = 0
+    for key in order:
+        member[key] = True
+        expiry[key] = ttl
+        _append(key, prev, nxt, ends)
+        size += 1
+
+    free_requests = 0
+    free_scenes = 0
+    total_scenes = 0
+    for request in requests:
+        start = starts[request]
+        stop = start + lengths[request]
+
+        # Every scene is looked up before the request is put, as in `run_simulation`.
+        hits = _count_hits(start, stop, scenes, policy, member, expiry, epoch)
+        free_scenes += hits
+        total_scenes += stop - start
+        if hits == stop - start:
+            free_requests += 1
+
+        epoch += 1
+        if policy == TTL:
+            _put_ttl(start, stop, scenes, expiry, epoch + ttl)
+            continue
+        if policy == COMBINATION:
+            size -= _expire(epoch, member, expiry, prev, nxt, ends)
+        size = _put_lru(
+            start,
+            stop,
+            scenes,
+            capacity,
+            size,
+            epoch + ttl,
+            member,
+            expiry,
+            prev,
+            nxt,
+            ends,
+        )
+
+    return np.array([free_requests, free_scenes, total_scenes], dtype=np.int64)
+
+
+@njit(cache=True)
+def replay_runs(
+    starts, lengths, scenes, requests, policy, capacity, expiration_time, orders
+):
+    """Replay a batch of runs, one row of `requests` and `orders` per run."""
+    metrics = np.empty((requests.shape[0], 3), dtype=np.int64)
+    for run in range(requests.shape[0]):
+        metrics[run] = replay_run(
+            starts,
+            lengths,
+            scenes,
+            requests[run],
+            policy,
+            capacity,
+            expiration_time,
+            orders[run],
+        )
+    return metrics
+
+
+class CompiledEngine:
+    """Runs batches of seeded simulation runs inside the compiled kernels."""
+
+    def __init__(
+        self,
+        footprints: Sequence[FootprintIndex],
+        cache_type: str,
+        param: int,
+        prepopulate_cache: bool = False,
+    ) -> None:
+        """Pack the footprints and the cache settings for the kernels.
+
+        Args:
+            footprints (Sequence[FootprintIndex]): Scene footprints of each scale.
+            cache_type (str): Cache type, as in `MonteCarloSimulation`.
+            param (int): Cache parameter.
+            prepopulate_cache (bool, optional): Prepopulate the caches. Defaults to
+                False.
+        """
+        if cache_type not in POLICIES:
+            raise ValueError(f"Invalid cache type. Use one of {list(POLICIES)}.")
+        stream = RequestStream(footprints)
+        self.feature_base = stream.feature_base
+        self.starts = stream.starts.astype(np.int64)
+        self.lengths = stream.lengths.astype(np.int64)
+        self.scenes = stream.scenes.astype(np.int64)
+        self.policy = POLICIES[cache_type]
+        self.capacity = int(param) if self.policy != TTL else 0
+        self.expiration_time = (
+            int(param) if self.policy == TTL else COMBINATION_EXPIRATION
+        )
+        # `TimeCache` ignores prepopulation
+        self.prepopulate_cache = prepopulate_cache and self.policy != TTL
+
+    def replay(
+        self,
+        weights: Sequence[float],
+        feature_counts: Sequence[int],
+        num: int,
+        seeds: List[np.random.SeedSequence],
+        draw_requests: Optional[
+            Callable[[np.random.Generator], Tuple[np.ndarray, np.ndarray]]
+        ] = None,
+    ) -> np.ndarray:
+        """Draw the streams of each seeded run and replay them as one batch.
+
+        The requests and prepopulated scenes are drawn exactly as in
+        `run_seeded_simulation`, so the metrics equal those of the Python engine.
+
+        Args:
+            weights (Sequence[float]): Scale weights of the requests.
+            feature_counts (Sequence[int]): Number of features of each scale.
+            num (int): Number of requests per run.
+            seeds (List[np.random.SeedSequence]): Seed sequence of each run.
+            draw_requests (Optional[Callable], optional): Draws the requests of a run,
+                such as `MonteCarloSimulation.draw_requests`. Defaults to
+                `generate_requests`.
+
+        Returns:
+            np.ndarray: Free requests, free scenes and total scenes of each run.
+        """
+        size = min(self.capacity, NUM_SCENES) if self.prepopulate_cache else 0
+        scales, features, orders = draw_seeded_runs(
+            seeds, weights, feature_counts, num, size, draw_requests=draw_requests
+        )
+        return self.replay_requests(self.feature_base[scales] + features, orders)
+
+    def replay_requests(self, requests: np.ndarray, orders: np.ndarray) -> np.ndarray:
+        """Replay flat request indices shaped (runs, num) in one kernel call.
+
+        Args:
+            requests (np.ndarray): Flat request indices of each run.
+            orders (np.ndarray): Prepopulated scenes of each run, least recent first.
+
+        Returns:
+            np.ndarray: Free requests, free scenes and total scenes of each run.
+        """
+        return replay_runs(
+            self.starts,
+            self.lengths,
+            self.scenes,
+            requests,
+            self.policy,
+            self.capacity,
+            self.expiration_time,
+            orders,
+        )
+
+
+def check_parity(
+    simulator: Any,
+    num_runs: int = 8,
+    seed: Optional[int] = 0,
+    engine: Optional[CompiledEngine] = None,
+) -> bool:
+    """Check that a batch engine and the Python caches agree on seeded runs.
+
+    Args:
+        simulator (Any): `MonteCarloSimulation` whose settings are replayed.
+        num_runs (int, optional): Number of runs compared. Defaults to 8.
+        seed (Optional[int], optional): Entropy of the runs. Defaults to 0.
+        engine (Optional[CompiledEngine], optional): Engine checked. Defaults to the
+            compiled kernels for the settings of `simulator`.
+
+    Returns:
+        bool: Whether the free requests, free scenes and total scenes of every run
+        are identical.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(num_runs)
+    if engine is None:
+        engine = CompiledEngine(
+            simulator.scenario.footprints,
+            simulator.cache_type,
+            simulator.param,
+            simulator.prepopulate_cache,
+        )
+    batched = engine.replay(
+        simulator.weights,
+        simulator.scenario.feature_counts,
+        simulator.num,
+        seeds,
+        draw_requests=simulator.draw_requests,
+    )
+    for run, run_seed in enumerate(seeds):
+        prepopulate_rng, workload_rng = run_streams(run_seed)
+        scales, features = simulator.draw_requests(workload_rng)
+        metrics = simulator.replay_requests(
+            simulator.create_cache(prepopulate_rng), scales, features
+        )
+        if tuple(batched[run]) != metrics:
+            return False
+    return True
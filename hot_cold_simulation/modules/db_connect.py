@@ -18,13 +18,23 @@ DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 
 
-def connect() -> Any:
+def connect(**overrides: Any) -> Any:
     """Create a connection to a PostgresSQL database.
 
+    Args:
+        **overrides (Any): Connection parameters replacing the configured ones, e.g. to
+            point at a local throwaway database.
+
     Returns:
         Any: Database connection object used to perform
     """
     # #"""Connect to the PostgreSQL database and return the connection."""
-    return psycopg2.connect(
-        dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT
-    )
+    params = {
+        "dbname": DB_NAME,
+        "user": DB_USER,
+        "password": DB_PASS,
+        "host": DB_HOST,
+        "port": DB_PORT,
+    }
+    params.update(overrides)
+    return psycopg2.connect(**params)
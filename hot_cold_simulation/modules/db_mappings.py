@@ -0,0 +1,108 @@
+import io
+from typing import Any, Dict, List
+
+import numpy as np
+from modules.footprint_index import FootprintIndex
+from modules.scenario import ScenarioData
+from modules.workload import SCALES
+
+
+def create_mapping_table(cursor: Any, table_name: str) -> None:
+    """Create a mapping table storing each footprint as a native integer array."""
+    cursor.execute(
+        f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        feature_index INTEGER PRIMARY KEY,
+        landsat_fids INTEGER[] NOT NULL
+    );
+    """
+    )
+
+
+def copy_mapping(cursor: Any, mapping: Dict[int, List[int]], table_name: str) -> None:
+    """Bulk load one mapping with `COPY FROM STDIN`.
+
+    Rows are copied into a temporary staging table and then inserted with
+    `ON CONFLICT DO NOTHING`, so loading the same mapping twice is harmless.
+
+    Args:
+        cursor (Any): Cursor of the connection holding the transaction.
+        mapping (Dict[int, List[int]]): Landsat indices intersecting each feature index.
+        table_name (str): Destination mapping table.
+    """
+    buffer = io.StringIO()
+    for idx, landsat_indices in mapping.items():
+        buffer.write(f"{idx}\t{{{','.join(map(str, landsat_indices))}}}\n")
+    buffer.seek(0)
+
+    staging_table = f"{table_name}_staging"
+    cursor.execute(
+        f"CREATE TEMP TABLE {staging_table} (LIKE {table_name}) ON COMMIT DROP;"
+    )
+    cursor.copy_expert(
+        f"COPY {staging_table} (feature_index, landsat_fids) FROM STDIN", buffer
+    )
+    cursor.execute(
+        f"""
+    INSERT INTO {table_name} (feature_index, landsat_fids)
+    SELECT feature_index, landsat_fids FROM {staging_table}
+    ON CONFLICT DO NOTHING;
+    """
+    )
+
+
+def write_mappings(conn: Any, mappings: Dict[str, Dict[int, List[int]]]) -> None:
+    """Create and bulk load the mapping table of every scale in one transaction.
+
+    Args:
+        conn (Any): Open database connection. It is committed on success and rolled
+            back on error, but not closed.
+        mappings (Dict[str, Dict[int, List[int]]]): Mapping of each table name.
+    """
+    with conn, conn.cursor() as cursor:
+        for table_name, mapping in mappings.items():
+            create_mapping_table(cursor, table_name)
+            copy_mapping(cursor, mapping, table_name)
+
+
+def read_footprint_index(conn: Any, table_name: str) -> FootprintIndex:
+    """Read a mapping table back as a CSR footprint index with `COPY TO STDOUT`.
+
+    Args:
+        conn (Any): Open database connection.
+        table_name (str): Mapping table written by `write_mappings`.
+
+    Returns:
+        FootprintIndex: Footprints ordered by feature index.
+    """
+    buffer = io.StringIO()
+    with conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"""
+        COPY (
+            SELECT cardinality(landsat_fids), array_to_string(landsat_fids, ' ')
+            FROM {table_name} ORDER BY feature_index
+        ) TO STDOUT
+        """,
+            buffer,
+        )
+    rows = [line.split("\t") for line in buffer.getvalue().splitlines()]
+
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum([int(count) for count, _ in rows], out=offsets[1:])
+    scenes = np.array(" ".join(text for _, text in rows).split(), dtype=np.uint16)
+    return FootprintIndex(offsets, scenes)
+
+
+def load_scenario_data_from_database(conn: Any) -> ScenarioData:
+    """Read the `<scale>_mapping` tables into a scenario dataset for the simulator.
+
+    Args:
+        conn (Any): Open database connection.
+
+    Returns:
+        ScenarioData: The scenario dataset, usable in place of the pickles.
+    """
+    return ScenarioData(
+        [read_footprint_index(conn, f"{scale}_mapping") for scale in SCALES]
+    )
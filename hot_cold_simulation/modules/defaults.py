@@ -1,5 +1,9 @@
 # default_config.py
 
+# Pool every entry point runs its simulations on, unless configured otherwise. Processes
+# sidestep the GIL that serializes the Python engine on threads.
+DEFAULT_BACKEND = "process"
+
 default_configurations = {
     "database": {
         "DB_NAME": "railway",
@@ -16,5 +20,16 @@ default_configurations = {
         "prepopulate_cache": True,
         "num_runs": 32,
         "return_type": "requests",
+        "backend": DEFAULT_BACKEND,
+        "engine": "python",
+        "workload": "uniform",
+        "search_mode": "grid",
+        "simulation_budget": 2000,
+        "ci_width": 0,
+        "min_runs": 8,
+        "batch_runs": 8,
+        "seed": "",
+        "common_random_numbers": False,
+        "stack_distance": False,
     },
 }
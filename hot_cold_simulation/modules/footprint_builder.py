@@ -0,0 +1,86 @@
+import concurrent.futures
+from typing import Any, Dict, List
+
+import geopandas as gpd  # type: ignore
+import numpy as np
+
+# Landsat scene geometries and their spatial index, set once per worker process.
+_WORKER_DATA: Dict[str, Any] = {}
+
+
+def _init_worker(landsat_geometry: gpd.GeoSeries) -> None:
+    """Build the Landsat spatial index once in a worker process."""
+    _WORKER_DATA["sindex"] = landsat_geometry.sindex
+
+
+def _query_chunk(geometry: np.ndarray, sindex: Any = None) -> np.ndarray:
+    """Return `(feature, scene)` position pairs of the intersecting geometries.
+
+    Args:
+        geometry (np.ndarray): Feature geometries of the chunk.
+        sindex (Any, optional): Landsat spatial index. Defaults to the index of the
+            worker process.
+
+    Returns:
+        np.ndarray: Array of shape (2, n) of positions into `geometry` and the scenes.
+    """
+    sindex = _WORKER_DATA["sindex"] if sindex is None else sindex
+    return sindex.query(geometry, predicate="intersects")
+
+
+def build_footprint_mappings(
+    layers: Dict[str, gpd.GeoDataFrame],
+    landsat_gdf: gpd.GeoDataFrame,
+    num_workers: int = 1,
+    chunk_size: int = 1000,
+) -> Dict[str, Dict[int, List[int]]]:
+    """Map the features of several layers to the Landsat scenes they intersect.
+
+    The features of every layer are stacked and bulk-queried against one STRtree
+    built over the Landsat scenes, so all scales are mapped in a single pass instead
+    of testing every feature against every scene.
+
+    Args:
+        layers (Dict[str, gpd.GeoDataFrame]): Feature layers keyed by scale name.
+        landsat_gdf (gpd.GeoDataFrame): Landsat scene footprints.
+        num_workers (int, optional): Number of processes the features are split across
+            in chunks. Defaults to 1, which queries in the current process.
+        chunk_size (int, optional): Number of features per chunk. Defaults to 1000.
+
+    Returns:
+        Dict[str, Dict[int, List[int]]]: For each layer, a mapping from feature index
+        to the sorted Landsat indices it intersects, in the order of the layer index.
+    """
+    geometry = np.concatenate([gdf.geometry.values for gdf in layers.values()])
+    bounds = np.cumsum([0] + [len(gdf) for gdf in layers.values()])
+
+    if num_workers > 1:
+        starts = range(0, len(geometry), chunk_size)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(landsat_gdf.geometry,),
+        ) as executor:
+            parts = executor.map(
+                _query_chunk, [geometry[start : start + chunk_size] for start in starts]
+            )
+            # Chunk positions are local, so shift the feature row by the chunk start
+            pairs = np.concatenate(
+                [part + np.array([[start], [0]]) for start, part in zip(starts, parts)],
+                axis=1,
+            )
+    else:
+        pairs = _query_chunk(geometry, landsat_gdf.sindex)
+
+    # Sort by feature, then scene, so each footprint comes out in Landsat index order.
+    order = np.lexsort((pairs[1], pairs[0]))
+    features, scenes = pairs[0][order], landsat_gdf.index.to_numpy()[pairs[1][order]]
+    splits = np.searchsorted(features, np.arange(len(geometry) + 1))
+
+    mappings = {}
+    for (name, gdf), start, stop in zip(layers.items(), bounds[:-1], bounds[1:]):
+        mappings[name] = {
+            idx: scenes[splits[position] : splits[position + 1]].tolist()
+            for idx, position in zip(gdf.index, range(start, stop))
+        }
+    return mappings
@@ -0,0 +1,155 @@
+import random
+from collections import Counter, OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+
+# Hash rows of the frequency sketch.
+SKETCH_DEPTH = 4
+
+# Largest count of a sketch counter, as the 4-bit counters of TinyLFU.
+SKETCH_MAX_COUNT = 15
+
+
+class FrequencySketch:
+    """Count-min sketch of recent request frequencies with periodic aging (TinyLFU).
+
+    Every increment adds one to `SKETCH_DEPTH` hashed counters, and the estimate is
+    the smallest of them. After `sample_size` increments every counter is halved, so
+    the estimates follow the recent popularity of the footprints.
+    """
+
+    def __init__(self, width: int, sample_size: int) -> None:
+        """Allocate the counters.
+
+        Args:
+            width (int): Counters per hash row, rounded up to a power of two.
+            sample_size (int): Increments between two halvings of the counters.
+        """
+        self.width = 1 << max(int(width) - 1, 1).bit_length()
+        self.sample_size = max(int(sample_size), 1)
+        self.counters = np.zeros((SKETCH_DEPTH, self.width), dtype=np.int8)
+        self.additions = 0
+
+    def indices(self, key: Hashable) -> Tuple[int, ...]:
+        """Return the counter of `key` in every hash row."""
+        return tuple(hash((row, key)) & (self.width - 1) for row in range(SKETCH_DEPTH))
+
+    def estimate(self, key: Hashable) -> int:
+        """Return the estimated recent frequency of `key`."""
+        return int(self.counters[range(SKETCH_DEPTH), self.indices(key)].min())
+
+    def increment(self, key: Hashable) -> None:
+        """Record one request of `key` and age the sketch once it is due."""
+        cells = (range(SKETCH_DEPTH), self.indices(key))
+        self.counters[cells] = np.minimum(self.counters[cells] + 1, SKETCH_MAX_COUNT)
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.counters >>= 1
+            self.additions //= 2
+
+
+class FootprintCache:
+    """Hot layer that admits and evicts whole request footprints.
+
+    A request is only free when every scene of its footprint is cached, so the cache
+    keeps footprints, in least recently used order, instead of single scenes. A scene
+    is cached while at least one cached footprint holds it, and `capacity` bounds the
+    number of distinct cached scenes. A footprint that only fits by evicting others is
+    admitted if its recent frequency in a `FrequencySketch` is at least the summed
+    frequencies of the footprints it would evict, so a large, rarely requested region
+    footprint can't flush many popular county footprints, while ties go to the more
+    recent footprint as in LRU. Footprints larger than the cache are never admitted.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+        num_scenes: int = NUM_SCENES,
+    ):
+        self.capacity = capacity
+        self.rng = rng
+        self.num_scenes = num_scenes
+        self.footprints: "OrderedDict[Tuple[int, ...], Tuple[int, ...]]" = OrderedDict()
+        self.references = np.zeros(num_scenes, dtype=np.int64)
+        self.size = 0
+        # TinyLFU sizes its sample to ten times the number of cached items
+        self.sketch = FrequencySketch(4 * num_scenes, 10 * max(capacity, 1))
+        if prepopulate:
+            self.prepopulate_cache()
+
+    def get(self, key: int) -> int:
+        if self.references[key] == 0:
+            return -1
+        else:
+            return key
+
+    def put(self, keys: List[int]) -> None:
+        footprint = tuple(keys)
+        self.sketch.increment(footprint)
+        if footprint in self.footprints:
+            self.footprints.move_to_end(footprint)
+            return
+
+        scenes = tuple(dict.fromkeys(footprint))
+        if len(scenes) > self.capacity:
+            return
+        new = sum(1 for scene in scenes if self.references[scene] == 0)
+        victims = self.victims(scenes, self.size + new - self.capacity)
+        if victims:
+            frequency = sum(self.sketch.estimate(victim) for victim in victims)
+            if self.sketch.estimate(footprint) < frequency:
+                return
+            for victim in victims:
+                self.evict(victim)
+
+        # Evicted footprints may have held scenes of this one, so count them again
+        self.size += int(np.count_nonzero(self.references[list(scenes)] == 0))
+        self.footprints[footprint] = scenes
+        self.references[list(scenes)] += 1
+
+    def victims(self, scenes: Tuple[int, ...], excess: int) -> List[Tuple[int, ...]]:
+        """Return the least recently used footprints that free `excess` scenes.
+
+        Scenes shared with `scenes` or with a footprint that stays cached are not
+        freed by an eviction.
+        """
+        victims: List[Tuple[int, ...]] = []
+        if excess <= 0:
+            return victims
+        keep = set(scenes)
+        released: Counter = Counter()
+        freed = 0
+        for victim, victim_scenes in self.footprints.items():
+            victims.append(victim)
+            for scene in victim_scenes:
+                released[scene] += 1
+                if released[scene] == self.references[scene] and scene not in keep:
+                    freed += 1
+            if freed >= excess:
+                break
+        return victims
+
+    def evict(self, footprint: Tuple[int, ...]) -> None:
+        """Drop a cached footprint and the scenes no other footprint holds."""
+        scenes = list(self.footprints.pop(footprint))
+        self.references[scenes] -= 1
+        self.size -= int(np.count_nonzero(self.references[scenes] == 0))
+
+    def prepopulate_cache(self) -> None:
+        # The scenes of `LRUCache.prepopulate_cache`, each cached as its own footprint
+        # that was never requested, so any requested footprint can replace them
+        if self.rng is not None:
+            keys = self.rng.permutation(self.num_scenes)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(self.num_scenes), self.capacity)
+        for key in keys:
+            self.footprints[(key,)] = (key,)
+        self.references[keys] += 1
+        self.size = len(keys)
+
+    def current_state(self) -> list[Any]:
+        return np.flatnonzero(self.references).tolist()
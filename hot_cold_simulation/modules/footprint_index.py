@@ -0,0 +1,93 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class FootprintIndex:
+    """CSR-packed Landsat scene footprints of every feature at one scale.
+
+    The scene IDs of feature `i` are `scenes[offsets[i]:offsets[i + 1]]`, so a
+    footprint lookup is a slice. Both arrays are stored as `.npy` files that can be
+    memory-mapped, which makes loading the index near-instant.
+    """
+
+    def __init__(self, offsets: np.ndarray, scenes: np.ndarray) -> None:
+        """Wrap already packed arrays.
+
+        Args:
+            offsets (np.ndarray): `len(features) + 1` start offsets into `scenes`.
+            scenes (np.ndarray): Concatenated uint16 scene IDs of every footprint.
+        """
+        self.offsets = offsets
+        self.scenes = scenes
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, feature: int) -> np.ndarray:
+        return self.scenes[self.offsets[feature] : self.offsets[feature + 1]]
+
+    def head(self, count: int) -> "FootprintIndex":
+        """Return a view of the first `count` features."""
+        count = min(count, len(self))
+        offsets = self.offsets[: count + 1]
+        return FootprintIndex(offsets, self.scenes[: offsets[-1]])
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[int, List[int]]) -> "FootprintIndex":
+        """Pack a mapping from feature index to scene IDs, in the mapping's order.
+
+        Args:
+            mapping (Dict[int, List[int]]): Footprint of each feature.
+
+        Returns:
+            FootprintIndex: The packed index.
+        """
+        lengths = np.fromiter((len(v) for v in mapping.values()), dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        scenes = np.fromiter(
+            (scene for v in mapping.values() for scene in v),
+            dtype=np.uint16,
+            count=int(offsets[-1]),
+        )
+        return cls(offsets, scenes)
+
+    def save(self, directory: Path, name: str) -> None:
+        """Write the index as `<name>_offsets.npy` and `<name>_scenes.npy`.
+
+        Args:
+            directory (Path): Output directory, created if missing.
+            name (str): Scale name used as the file prefix.
+        """
+        directory.mkdir(exist_ok=True, parents=True)
+        np.save(directory / f"{name}_offsets.npy", self.offsets)
+        np.save(directory / f"{name}_scenes.npy", self.scenes)
+
+    @classmethod
+    def load(
+        cls, directory: Path, name: str, mmap_mode: Optional[str] = "r"
+    ) -> "FootprintIndex":
+        """Open an index written by `save`, memory-mapped by default.
+
+        Args:
+            directory (Path): Directory holding the `.npy` files.
+            name (str): Scale name used as the file prefix.
+            mmap_mode (Optional[str], optional): Passed to `np.load`. Defaults to "r".
+
+        Returns:
+            FootprintIndex: The loaded index.
+        """
+        return cls(
+            np.load(directory / f"{name}_offsets.npy", mmap_mode=mmap_mode),
+            np.load(directory / f"{name}_scenes.npy", mmap_mode=mmap_mode),
+        )
+
+    @staticmethod
+    def exists(directory: Path, name: str) -> bool:
+        """Check whether both files of an index are present."""
+        return all(
+            (directory / f"{name}_{part}.npy").exists()
+            for part in ("offsets", "scenes")
+        )
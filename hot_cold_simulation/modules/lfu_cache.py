@@ -0,0 +1,105 @@
+import random
+from collections import OrderedDict, defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+
+
+class LFUCache:
+    """Least frequently used cache over scene IDs whose counts age over time.
+
+    Scenes are kept in one LRU-ordered bucket per reference count, so a reference
+    moves a scene to the next bucket and an eviction pops the least recently used
+    scene of the lowest count, both in O(1). Every `aging_period` puts all counts are
+    halved, which is O(capacity) but amortized O(1) per reference, so scenes that were
+    popular long ago don't stay cached forever.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+        num_scenes: int = NUM_SCENES,
+        aging_period: Optional[int] = None,
+    ):
+        self.capacity = capacity
+        self.rng = rng
+        self.num_scenes = num_scenes
+        self.aging_period = aging_period or 10 * max(capacity, 1)
+        self.counts: Dict[int, int] = {}
+        self.buckets: DefaultDict[int, "OrderedDict[int, None]"] = defaultdict(
+            OrderedDict
+        )
+        self.min_count = 0
+        self.references = 0
+        if prepopulate:
+            self.prepopulate_cache()
+
+    def get(self, key: int) -> int:
+        if key not in self.counts:
+            return -1
+        else:
+            return key
+
+    def put(self, keys: List[int]) -> None:
+        for key in keys:
+            self.reference(key)
+
+    def reference(self, key: int) -> None:
+        """Apply one reference to `key`."""
+        if self.capacity <= 0:
+            return
+        count = self.counts.get(key)
+        if count is not None:
+            self.move(key, count, count + 1)
+        else:
+            if len(self.counts) >= self.capacity:
+                evicted, _ = self.buckets[self.min_count].popitem(last=False)
+                if not self.buckets[self.min_count]:
+                    del self.buckets[self.min_count]
+                del self.counts[evicted]
+            self.counts[key] = 1
+            self.buckets[1][key] = None
+            self.min_count = 1
+
+        self.references += 1
+        if self.references >= self.aging_period:
+            self.age()
+
+    def move(self, key: int, count: int, new_count: int) -> None:
+        """Move `key` from the bucket of `count` to the bucket of `new_count`."""
+        del self.buckets[count][key]
+        if not self.buckets[count]:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = new_count
+        self.counts[key] = new_count
+        self.buckets[new_count][key] = None
+
+    def age(self) -> None:
+        """Halve every count, keeping the recency order within each count."""
+        buckets: DefaultDict[int, "OrderedDict[int, None]"] = defaultdict(OrderedDict)
+        for count in sorted(self.buckets):
+            halved = max(count // 2, 1)
+            for key in self.buckets[count]:
+                self.counts[key] = halved
+                buckets[halved][key] = None
+        self.buckets = buckets
+        self.min_count = min(buckets, default=0)
+        self.references = 0
+
+    def prepopulate_cache(self) -> None:
+        # The scenes of `LRUCache.prepopulate_cache`, each referenced once
+        if self.rng is not None:
+            keys = self.rng.permutation(self.num_scenes)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(self.num_scenes), self.capacity)
+        for key in keys:
+            self.counts[key] = 1
+            self.buckets[1][key] = None
+        self.min_count = 1 if keys else 0
+
+    def current_state(self) -> list[Any]:
+        return list(self.counts.keys())
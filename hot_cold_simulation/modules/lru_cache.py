@@ -1,13 +1,21 @@
 # type: ignore
 import random
 from collections import OrderedDict
-from typing import Any, List
+from typing import Any, List, Optional
+
+import numpy as np
 
 
 class LRUCache:
-    def __init__(self, capacity: int, prepopulate=False):
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+    ):
         self.cache = OrderedDict()
         self.capacity = capacity
+        self.rng = rng
         if prepopulate:
             self.prepopulate_cache()
 
@@ -29,7 +37,13 @@ class LRUCache:
             self.cache.move_to_end(key)
 
     def prepopulate_cache(self) -> None:
-        keys = random.sample(range(886), self.capacity)
+        # A prefix of one permutation inserted in reverse, so for every capacity the
+        # first scene is the most recent and the recency stacks of smaller caches nest
+        # in those of larger ones
+        if self.rng is not None:
+            keys = self.rng.permutation(886)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(886), self.capacity)
         for key in keys:
             self.cache[key] = key
 
@@ -0,0 +1,302 @@
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd  # type: ignore
+from modules.stochastic_workload import (
+    STOCHASTIC_DIR,
+    StochasticDemand,
+    load_stochastic_demand,
+)
+
+# File prefix of the paths of each scale in `SCALES` order, as in the notebook CSVs.
+PATH_NAMES = ("divisions", "states", "counties")
+
+# Number of steps of a generated path.
+PATH_STEPS = 100
+
+
+class ProbabilityPaths:
+    """Probability of every feature of one scale at every step of a demand path.
+
+    The probabilities are stored step-major in float32 next to the cumulative
+    distribution of every step, so drawing a feature is a binary search in one row of
+    the CDF. Both arrays are `.npy` files that can be memory-mapped, which keeps even
+    county paths cheap to open.
+    """
+
+    def __init__(self, probabilities: np.ndarray, cdf: np.ndarray) -> None:
+        """Wrap already computed arrays.
+
+        Args:
+            probabilities (np.ndarray): Float32 (steps x features) probabilities.
+            cdf (np.ndarray): Float32 cumulative sums of every row of `probabilities`.
+        """
+        self.probabilities = probabilities
+        self.cdf = cdf
+
+    def __len__(self) -> int:
+        return self.probabilities.shape[0]
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> "ProbabilityPaths":
+        """Pack a (features x steps) matrix such as the notebook CSVs.
+
+        Args:
+            matrix (np.ndarray): Demand of each feature (row) at each step (column).
+                Columns are normalized to sum to one.
+
+        Returns:
+            ProbabilityPaths: The packed paths.
+        """
+        steps = np.asarray(matrix, dtype=np.float64).T
+        cdf = np.cumsum(steps, axis=1)
+        cdf /= cdf[:, -1:]
+        probabilities = steps / steps.sum(axis=1, keepdims=True)
+        return cls(
+            np.ascontiguousarray(probabilities, dtype=np.float32),
+            np.ascontiguousarray(cdf, dtype=np.float32),
+        )
+
+    @classmethod
+    def read_csv(cls, path: Path) -> "ProbabilityPaths":
+        """Read a (features x steps) CSV written by the notebook."""
+        return cls.from_matrix(pd.read_csv(path).to_numpy(dtype=np.float64))
+
+    def sample(
+        self, uniforms: np.ndarray, steps: np.ndarray, count: Optional[int] = None
+    ) -> np.ndarray:
+        """Draw one feature per uniform by inverse CDF over the row of its step.
+
+        Args:
+            uniforms (np.ndarray): Uniforms in [0, 1).
+            steps (np.ndarray): Step of each uniform, wrapped around the path length.
+            count (Optional[int], optional): Only draw among the first `count`
+                features, renormalized, as the notebook does. Defaults to all features.
+
+        Returns:
+            np.ndarray: Feature index of each uniform.
+        """
+        count = self.cdf.shape[1] if count is None else min(count, self.cdf.shape[1])
+        steps = np.asarray(steps) % len(self)
+        features = np.empty(len(uniforms), dtype=np.int64)
+        order = np.argsort(steps, kind="stable")
+        bounds = np.searchsorted(steps[order], np.arange(len(self) + 1))
+        for step in np.flatnonzero(np.diff(bounds)):
+            group = order[bounds[step] : bounds[step + 1]]
+            row = self.cdf[step, :count]
+            features[group] = np.searchsorted(
+                row, uniforms[group] * row[-1], side="right"
+            )
+        return np.minimum(features, count - 1)
+
+    def save(self, directory: Path, name: str) -> None:
+        """Write the paths as `<name>_probabilities.npy` and `<name>_cdf.npy`.
+
+        Each file is written to a temporary file that is then renamed, so concurrent
+        readers never open a partial file.
+
+        Args:
+            directory (Path): Output directory, created if missing.
+            name (str): Scale name used as the file prefix.
+        """
+        directory.mkdir(exist_ok=True, parents=True)
+        for part, array in (("probabilities", self.probabilities), ("cdf", self.cdf)):
+            with tempfile.NamedTemporaryFile(
+                dir=directory, suffix=".npy", delete=False
+            ) as file:
+                np.save(file, array)
+            Path(file.name).replace(directory / f"{name}_{part}.npy")
+
+    @classmethod
+    def load(
+        cls, directory: Path, name: str, mmap_mode: Optional[str] = "r"
+    ) -> "ProbabilityPaths":
+        """Open paths written by `save`, memory-mapped by default.
+
+        Args:
+            directory (Path): Directory holding the `.npy` files.
+            name (str): Scale name used as the file prefix.
+            mmap_mode (Optional[str], optional): Passed to `np.load`. Defaults to "r".
+
+        Returns:
+            ProbabilityPaths: The loaded paths.
+        """
+        return cls(
+            np.load(directory / f"{name}_probabilities.npy", mmap_mode=mmap_mode),
+            np.load(directory / f"{name}_cdf.npy", mmap_mode=mmap_mode),
+        )
+
+    @staticmethod
+    def exists(directory: Path, name: str) -> bool:
+        """Check whether both files of the paths are present."""
+        return all(
+            (directory / f"{name}_{part}.npy").exists()
+            for part in ("probabilities", "cdf")
+        )
+
+
+def generate_probability_paths(
+    demand: StochasticDemand,
+    rng: np.random.Generator,
+    scale: int,
+    steps: int = PATH_STEPS,
+) -> ProbabilityPaths:
+    """Generate one hotspot path of a scale from the stochastic workload.
+
+    Args:
+        demand (StochasticDemand): Kernels and hotspot settings of the workload.
+        rng (np.random.Generator): Generator the hotspots are drawn from.
+        scale (int): Scale index.
+        steps (int, optional): Length of the path. Defaults to `PATH_STEPS`.
+
+    Returns:
+        ProbabilityPaths: The packed path.
+    """
+    centres, lags = demand.hotspots(rng, scale, (steps,))
+    return ProbabilityPaths.from_matrix(demand.demand_paths(centres, lags, scale))
+
+
+def convert_csv_paths(directory: Path) -> Tuple[str, ...]:
+    """Convert every `<name>_stochastic.csv` of a directory to the binary format.
+
+    Args:
+        directory (Path): Directory of the CSVs, which also receives the `.npy` files.
+
+    Returns:
+        Tuple[str, ...]: Names of the converted scales.
+    """
+    converted = []
+    for name in PATH_NAMES:
+        path = directory / f"{name}_stochastic.csv"
+        if path.exists():
+            ProbabilityPaths.read_csv(path).save(directory, name)
+            converted.append(name)
+    return tuple(converted)
+
+
+def generate_missing_paths(
+    feature_counts: Tuple[int, ...],
+    seed: Optional[int] = None,
+    path_dir: Optional[str] = None,
+    scales: Iterable[int] = range(len(PATH_NAMES)),
+) -> Tuple[str, ...]:
+    """Write the binary paths of every scale that has none, once before simulating.
+
+    A scale is converted from its `<name>_stochastic.csv` when there is one, and
+    generated with the stochastic workload otherwise. Scale `i` is generated from
+    child `i` of `seed`, so its path only depends on the seed and the scale.
+
+    Args:
+        feature_counts (Tuple[int, ...]): Number of features of each scale.
+        seed (Optional[int], optional): Entropy of the generated paths. Defaults to
+            None.
+        path_dir (Optional[str], optional): Directory of the paths. Defaults to
+            `./stochastic_paths` in the current working directory.
+        scales (Iterable[int], optional): Scale indices to prepare. Defaults to every
+            scale.
+
+    Returns:
+        Tuple[str, ...]: Names of the written scales.
+    """
+    directory = Path(path_dir or Path.cwd() / STOCHASTIC_DIR).resolve()
+    seeds = np.random.SeedSequence(seed).spawn(len(PATH_NAMES))
+    written = []
+    for scale in scales:
+        name = PATH_NAMES[scale]
+        if ProbabilityPaths.exists(directory, name):
+            continue
+        csv_path = directory / f"{name}_stochastic.csv"
+        if csv_path.exists():
+            paths = ProbabilityPaths.read_csv(csv_path)
+        else:
+            demand = load_stochastic_demand(feature_counts)
+            rng = np.random.default_rng(seeds[scale])
+            paths = generate_probability_paths(demand, rng, scale)
+        paths.save(directory, name)
+        written.append(name)
+    return tuple(written)
+
+
+@lru_cache(maxsize=None)
+def load_probability_paths(
+    scales: Tuple[int, ...], path_dir: Optional[str] = None
+) -> Tuple[Optional[ProbabilityPaths], ...]:
+    """Load the precomputed probability paths of some scales once per process.
+
+    Paths missing from `<path_dir>/<name>_{probabilities,cdf}.npy` are converted from
+    the scale's `<name>_stochastic.csv` when there is one. Paths are never generated
+    here, since every process would draw its own; run `generate_missing_paths` (the
+    `generate-paths` script) once instead.
+
+    Args:
+        scales (Tuple[int, ...]): Scale indices to load, such as the scales with a
+            nonzero weight.
+        path_dir (Optional[str], optional): Directory of the paths. Defaults to
+            `./stochastic_paths` in the current working directory.
+
+    Returns:
+        Tuple[Optional[ProbabilityPaths], ...]: Paths of each scale in `SCALES` order,
+        None for the scales not in `scales`.
+
+    Raises:
+        FileNotFoundError: If a scale has neither binary paths nor a CSV.
+    """
+    directory = Path(path_dir or Path.cwd() / STOCHASTIC_DIR).resolve()
+    paths: List[Optional[ProbabilityPaths]] = [None] * len(PATH_NAMES)
+    for scale in scales:
+        name = PATH_NAMES[scale]
+        if not ProbabilityPaths.exists(directory, name):
+            csv_path = directory / f"{name}_stochastic.csv"
+            if not csv_path.exists():
+                raise FileNotFoundError(
+                    f"No {name} probability paths in {directory}. Generate them once"
+                    " with `poetry run generate-paths`."
+                )
+            ProbabilityPaths.read_csv(csv_path).save(directory, name)
+        paths[scale] = ProbabilityPaths.load(directory, name)
+    return tuple(paths)
+
+
+def generate_path_requests(
+    rng: np.random.Generator,
+    weights: Sequence[float],
+    paths: Sequence[Optional[ProbabilityPaths]],
+    feature_counts: Sequence[int],
+    num: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Draw a stream of (scale, feature) requests from precomputed paths.
+
+    The scales are drawn as in `generate_requests`, and request `i` draws its feature
+    from step `i` of the path of its scale, restricted to the simulated features.
+
+    Args:
+        rng (np.random.Generator): Generator the uniforms are drawn from.
+        weights (Sequence[float]): Probability of each scale in `SCALES` order.
+        paths (Sequence[Optional[ProbabilityPaths]]): Paths of each scale, None for
+            the scales with a zero weight.
+        feature_counts (Sequence[int]): Number of features available at each scale.
+        num (int): Number of requests.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Scale indices and feature indices.
+    """
+    uniforms = rng.random((2, num))
+    cdf = np.cumsum(np.asarray(weights, dtype=np.float64))
+    cdf /= cdf[-1]
+    scales = np.searchsorted(cdf, uniforms[0], side="right")
+    np.minimum(scales, len(cdf) - 1, out=scales)
+
+    features = np.zeros(num, dtype=np.int64)
+    steps = np.arange(num)
+    for scale, (scale_paths, count) in enumerate(zip(paths, feature_counts)):
+        selected = scales == scale
+        if selected.any():
+            if scale_paths is None:
+                raise ValueError(f"No probability paths of scale {scale} were loaded.")
+            features[selected] = scale_paths.sample(
+                uniforms[1, selected], steps[selected], count
+            )
+    return scales, features
@@ -0,0 +1,134 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+# A cell of a sweep is identified by its cache parameter and its scale weights.
+Cell = Tuple[Any, Tuple[float, ...]]
+
+
+class ResultStore:
+    """Append-only SQLite store of the raw per-run results of sweep cells.
+
+    Every completed cell is committed on its own, so a sweep that dies can be restarted
+    and skip the cells that are already stored. Cells are keyed by a sweep description
+    (request count, cache type, runs, ...) so sweeps with different settings sharing
+    the same file never mix. The entropy of each sweep is stored too, which keeps the
+    random streams of resumed cells identical to an uninterrupted sweep.
+    """
+
+    def __init__(self, path: Path, sweep: Dict[str, Any]) -> None:
+        """Open (or create) the store for one sweep configuration.
+
+        Args:
+            path (Path): SQLite database file.
+            sweep (Dict[str, Any]): JSON-serializable settings identifying the sweep.
+        """
+        self.path = path
+        self.sweep = json.dumps(sweep, sort_keys=True)
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.execute(
+                """
+            CREATE TABLE IF NOT EXISTS sweeps (
+                sweep TEXT PRIMARY KEY,
+                entropy TEXT NOT NULL
+            )
+            """
+            )
+            self.conn.execute(
+                """
+            CREATE TABLE IF NOT EXISTS results (
+                sweep TEXT NOT NULL,
+                param TEXT NOT NULL,
+                weights TEXT NOT NULL,
+                run INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (sweep, param, weights, run)
+            )
+            """
+            )
+
+    def entropy(self, seed: Optional[int] = None) -> int:
+        """Return the entropy of the sweep, recording `seed` (or fresh entropy) once."""
+        row = self.conn.execute(
+            "SELECT entropy FROM sweeps WHERE sweep = ?", (self.sweep,)
+        ).fetchone()
+        if row is not None:
+            return int(row[0])
+        entropy = int(np.random.SeedSequence(seed).entropy)  # type: ignore
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO sweeps (sweep, entropy) VALUES (?, ?)",
+                (self.sweep, str(entropy)),
+            )
+        return entropy
+
+    def append_cell(self, param: Any, weights: Sequence[float], values: Any) -> None:
+        """Commit the per-run values of one completed cell.
+
+        Args:
+            param (Any): Cache parameter of the cell.
+            weights (Sequence[float]): Scale weights of the cell.
+            values (Any): Result of each run, in run order.
+        """
+        key = (self.sweep, json.dumps(param), json.dumps(list(weights)))
+        with self.conn:
+            self.conn.executemany(
+                """
+            INSERT OR REPLACE INTO results (sweep, param, weights, run, value)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+                [(*key, run, float(value)) for run, value in enumerate(values)],
+            )
+
+    def load(self) -> Dict[Cell, np.ndarray]:
+        """Return the per-run values of every stored cell of the sweep."""
+        cells: Dict[Cell, list] = {}
+        rows = self.conn.execute(
+            "SELECT param, weights, value FROM results WHERE sweep = ? ORDER BY run",
+            (self.sweep,),
+        )
+        for param, weights, value in rows:
+            cell = (json.loads(param), tuple(json.loads(weights)))
+            cells.setdefault(cell, []).append(value)
+        return {cell: np.array(values) for cell, values in cells.items()}
+
+    def completed_cells(self, num_runs: int) -> Set[Cell]:
+        """Return the cells that already hold `num_runs` runs."""
+        return {cell for cell, values in self.load().items() if len(values) >= num_runs}
+
+    def to_frame(self, cells: Optional[Iterable[Cell]] = None) -> pd.DataFrame:
+        """Summarize the stored cells as one row per cell.
+
+        Args:
+            cells (Optional[Iterable[Cell]], optional): Cells to include. Defaults to
+                every stored cell.
+
+        Returns:
+            pd.DataFrame: Parameter, weights, mean, standard error and run count.
+        """
+        stored = self.load()
+        rows = []
+        for cell in stored if cells is None else cells:
+            values = stored[cell]
+            # Sample standard deviation, as in the sequential sweep; one run has none
+            error = (
+                values.std(ddof=1) / np.sqrt(len(values)) if len(values) > 1 else 0.0
+            )
+            rows.append(
+                {
+                    "Parameter": cell[0],
+                    "Weights": cell[1],
+                    "Average Free Requests": values.mean(),
+                    "Standard Error": error,
+                    "Runs": len(values),
+                }
+            )
+        return pd.DataFrame(rows)
+
+    def close(self) -> None:
+        self.conn.close()
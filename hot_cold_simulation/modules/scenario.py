@@ -0,0 +1,68 @@
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from modules.footprint_index import FootprintIndex
+from modules.workload import SCALES
+
+# Mapping file and number of features used for each scale, in `SCALES` order.
+MAPPING_FILES = ("divisions_mapping.pkl", "states_mapping.pkl", "counties_mapping.pkl")
+FEATURE_LIMITS = (9, 49, 4437)
+FOOTPRINTS_DIR = "footprints"
+
+
+class ScenarioData:
+    """Read-only Landsat scene footprints of every feature at each request scale.
+
+    The footprints are CSR-packed `FootprintIndex` objects indexed by scale, so a
+    single instance can be shared by reference between simulators and threads, and
+    pickled once into each process pool worker.
+    """
+
+    def __init__(self, indexes: Sequence[FootprintIndex]) -> None:
+        """Keep the first `FEATURE_LIMITS` features of each scale.
+
+        Args:
+            indexes (Sequence[FootprintIndex]): Regions, states and counties indexes.
+        """
+        self.footprints = tuple(
+            index.head(limit) for index, limit in zip(indexes, FEATURE_LIMITS)
+        )
+        self.feature_counts = tuple(len(scale) for scale in self.footprints)
+
+    @classmethod
+    def from_mappings(cls, mappings: Sequence[Dict[int, List[int]]]) -> "ScenarioData":
+        """Build the dataset from mapping dictionaries of feature index to scene IDs."""
+        return cls([FootprintIndex.from_mapping(mapping) for mapping in mappings])
+
+
+def load_dict_from_file(data_dicts: Path, filename: str) -> Dict:
+    """Load dictionary from a file."""
+    with Path.open(data_dicts / filename, "rb") as f:
+        return pickle.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_scenario_data(data_dir: Optional[str] = None) -> ScenarioData:
+    """Load the footprints once per process.
+
+    The memory-mapped CSR index in `<data_dir>/footprints` is used when it exists,
+    otherwise the pickled mapping dictionaries are packed on the fly.
+
+    Args:
+        data_dir (Optional[str], optional): Directory holding the dictionaries.
+            Defaults to `./dictionaries` in the current working directory.
+
+    Returns:
+        ScenarioData: The shared scenario dataset.
+    """
+    data_dicts = Path(data_dir or Path.cwd() / "dictionaries").resolve()
+    footprints_dir = data_dicts / FOOTPRINTS_DIR
+    if all(FootprintIndex.exists(footprints_dir, scale) for scale in SCALES):
+        return ScenarioData(
+            [FootprintIndex.load(footprints_dir, scale) for scale in SCALES]
+        )
+    return ScenarioData.from_mappings(
+        [load_dict_from_file(data_dicts, filename) for filename in MAPPING_FILES]
+    )
@@ -0,0 +1,247 @@
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd  # type: ignore
+from modules.array_lru_cache import NUM_SCENES
+
+GB = 1e9
+
+# Placeholder prices and timings, replace them with a table of the real storage.
+# A Landsat Collection 2 Level-1 scene bundle is about 1 GB.
+DEFAULT_SCENE_SIZE = 1 * GB
+# Dollars per GB retrieved from the cold layer and promoted to the hot layer.
+DEFAULT_RETRIEVAL_COST_PER_GB = 0.01
+# Dollars per GB served to users, from either layer.
+DEFAULT_EGRESS_COST_PER_GB = 0.09
+# Seconds to retrieve a scene from the cold layer, and to serve it from the hot one.
+DEFAULT_RETRIEVAL_LATENCY = 60.0
+DEFAULT_HOT_LATENCY = 0.1
+
+
+class SceneCosts:
+    """Size, cold retrieval cost and cold retrieval latency of every Landsat scene.
+
+    The tables are indexed by the scene index of the simulator, i.e. the row of the
+    scene in `usa_landsat.shp`.
+    """
+
+    def __init__(
+        self,
+        sizes: np.ndarray,
+        retrieval_costs: np.ndarray,
+        retrieval_latencies: np.ndarray,
+        hot_latency: float = DEFAULT_HOT_LATENCY,
+        egress_cost_per_gb: float = DEFAULT_EGRESS_COST_PER_GB,
+    ) -> None:
+        """Wrap per-scene tables.
+
+        Args:
+            sizes (np.ndarray): Bytes of every scene.
+            retrieval_costs (np.ndarray): Dollars to promote every scene from the cold
+                to the hot layer.
+            retrieval_latencies (np.ndarray): Seconds to retrieve every scene from the
+                cold layer.
+            hot_latency (float, optional): Seconds to serve a scene from the hot layer.
+                Defaults to `DEFAULT_HOT_LATENCY`.
+            egress_cost_per_gb (float, optional): Dollars per GB served. Defaults to
+                `DEFAULT_EGRESS_COST_PER_GB`.
+        """
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self.retrieval_costs = np.asarray(retrieval_costs, dtype=np.float64)
+        self.retrieval_latencies = np.asarray(retrieval_latencies, dtype=np.float64)
+        self.hot_latency = hot_latency
+        self.egress_cost_per_gb = egress_cost_per_gb
+
+    @classmethod
+    def uniform(
+        cls,
+        size: float = DEFAULT_SCENE_SIZE,
+        retrieval_cost_per_gb: float = DEFAULT_RETRIEVAL_COST_PER_GB,
+        retrieval_latency: float = DEFAULT_RETRIEVAL_LATENCY,
+        hot_latency: float = DEFAULT_HOT_LATENCY,
+        egress_cost_per_gb: float = DEFAULT_EGRESS_COST_PER_GB,
+        num_scenes: int = NUM_SCENES,
+    ) -> "SceneCosts":
+        """Give every scene the same size, retrieval cost and latency."""
+        sizes = np.full(num_scenes, size)
+        return cls(
+            sizes,
+            sizes / GB * retrieval_cost_per_gb,
+            np.full(num_scenes, retrieval_latency),
+            hot_latency,
+            egress_cost_per_gb,
+        )
+
+    @classmethod
+    def from_table(
+        cls,
+        path: Path,
+        landsat_path: Optional[Path] = None,
+        hot_latency: float = DEFAULT_HOT_LATENCY,
+        egress_cost_per_gb: float = DEFAULT_EGRESS_COST_PER_GB,
+    ) -> "SceneCosts":
+        """Read the per-scene tables from a CSV file.
+
+        Scenes are identified by a `scene` column holding the scene index, or by the
+        `path` and `row` columns of the Landsat WRS-2 grid, matched against the `PATH`
+        and `ROW` attributes of `usa_landsat.shp`. The shapefile repeats a scene for
+        every state it overlaps, and a path and row applies to all of its copies. The
+        `size_bytes`, `retrieval_cost` (dollars per promotion) and `retrieval_latency`
+        (seconds) columns are optional; missing columns and scenes keep the defaults of
+        `uniform`.
+
+        Args:
+            path (Path): CSV file with one row per scene.
+            landsat_path (Optional[Path], optional): Landsat shapefile used to match
+                `path` and `row`. Defaults to `DATA_DIR/USA_Landsat/usa_landsat.shp`.
+            hot_latency (float, optional): Seconds to serve a scene from the hot layer.
+                Defaults to `DEFAULT_HOT_LATENCY`.
+            egress_cost_per_gb (float, optional): Dollars per GB served. Defaults to
+                `DEFAULT_EGRESS_COST_PER_GB`.
+
+        Returns:
+            SceneCosts: The scene tables.
+        """
+        table = pd.read_csv(path).rename(columns=str.lower)
+        if "scene" in table:
+            scenes = table["scene"].to_numpy(dtype=np.int64)
+        elif {"path", "row"} <= set(table.columns):
+            table = cls.match_scenes(table, landsat_path)
+            scenes = table["scene"].to_numpy(dtype=np.int64)
+        else:
+            raise ValueError(
+                "The cost table needs a 'scene' column or 'path' and 'row' columns."
+            )
+        if ((scenes < 0) | (scenes >= NUM_SCENES)).any():
+            raise ValueError("The cost table has scenes outside the Landsat grid.")
+
+        costs = cls.uniform(
+            hot_latency=hot_latency, egress_cost_per_gb=egress_cost_per_gb
+        )
+        if "size_bytes" in table:
+            costs.sizes[scenes] = table["size_bytes"].to_numpy(dtype=np.float64)
+            if "retrieval_cost" not in table:
+                costs.retrieval_costs[scenes] = (
+                    costs.sizes[scenes] / GB * DEFAULT_RETRIEVAL_COST_PER_GB
+                )
+        if "retrieval_cost" in table:
+            costs.retrieval_costs[scenes] = table["retrieval_cost"].to_numpy(
+                dtype=np.float64
+            )
+        if "retrieval_latency" in table:
+            costs.retrieval_latencies[scenes] = table["retrieval_latency"].to_numpy(
+                dtype=np.float64
+            )
+        return costs
+
+    @staticmethod
+    def match_scenes(
+        table: pd.DataFrame, landsat_path: Optional[Path] = None
+    ) -> pd.DataFrame:
+        """Add the `scene` indices of `usa_landsat.shp` to a table of paths and rows.
+
+        Returns:
+            pd.DataFrame: One row per scene index of every path and row of `table`.
+        """
+        import geopandas as gpd  # type: ignore
+
+        if landsat_path is None:
+            from modules.config import DATA_DIR  # type: ignore
+
+            landsat_path = DATA_DIR / "USA_Landsat" / "usa_landsat.shp"
+        landsat = gpd.read_file(landsat_path, ignore_geometry=True)
+        scenes = pd.DataFrame(
+            {
+                "path": landsat["PATH"].to_numpy(dtype=np.int64),
+                "row": landsat["ROW"].to_numpy(dtype=np.int64),
+                "scene": np.arange(len(landsat)),
+            }
+        )
+        table = table.astype({"path": np.int64, "row": np.int64})
+        matched = table.merge(scenes, on=["path", "row"], how="left")
+        if matched["scene"].isna().any():
+            raise ValueError("The cost table has a path and row not in the shapefile.")
+        return matched
+
+
+class CostLedger:
+    """Accumulates the cold reads, promotions, latency and dollars of replayed requests.
+
+    A scene missing from the hot layer is read from the cold layer, and promoted to the
+    hot layer only when the cache admits it, so admission-aware caches read scenes they
+    never promote. The scenes of a request are fetched in parallel, so the latency of a
+    request is that of its slowest scene: the retrieval latency of its slowest cold
+    read, or the hot latency when every scene is hot. Latencies are kept as a count
+    per distinct value, so the memory of a ledger doesn't grow with the requests.
+    """
+
+    def __init__(self, costs: SceneCosts) -> None:
+        self.costs = costs
+        self.bytes_served = 0.0
+        self.cold_reads = 0
+        self.cold_bytes = 0.0
+        self.promotions = 0
+        self.bytes_moved = 0.0
+        self.retrieval_cost = 0.0
+        self.latencies: Counter = Counter()
+
+    def record(
+        self, scenes: Sequence[int], missed: Sequence[int], promoted: Sequence[int]
+    ) -> None:
+        """Record one request.
+
+        Args:
+            scenes (Sequence[int]): Scenes of the request.
+            missed (Sequence[int]): Scenes of the request missing from the hot layer,
+                which are read from the cold layer.
+            promoted (Sequence[int]): Missed scenes the cache holds after the request.
+        """
+        costs = self.costs
+        self.bytes_served += float(costs.sizes[scenes].sum())
+        if len(missed):
+            self.cold_reads += len(missed)
+            self.cold_bytes += float(costs.sizes[missed].sum())
+            self.latencies[float(costs.retrieval_latencies[missed].max())] += 1
+        else:
+            self.latencies[costs.hot_latency] += 1
+        if len(promoted):
+            self.promotions += len(promoted)
+            self.bytes_moved += float(costs.sizes[promoted].sum())
+            self.retrieval_cost += float(costs.retrieval_costs[promoted].sum())
+
+    def latency_percentiles(self, percentiles: Sequence[float]) -> List[float]:
+        """Return nearest-rank percentiles of the recorded request latencies."""
+        if not self.latencies:
+            return [0.0] * len(percentiles)
+        values = sorted(self.latencies)
+        cumulative = np.cumsum([self.latencies[value] for value in values])
+        ranks = np.ceil(np.asarray(percentiles) / 100 * cumulative[-1])
+        positions = np.searchsorted(cumulative, np.maximum(ranks, 1))
+        return [values[position] for position in positions]
+
+    def totals(self) -> Dict[str, float]:
+        """Return the totals of the recorded requests.
+
+        Returns:
+            Dict[str, float]: Bytes served, scenes and bytes read from the cold layer
+            ("cold_reads", "cold_bytes"), scenes and bytes promoted to the hot layer
+            ("promotions", "bytes_moved"), median and 99th percentile request latency
+            ("p50_latency", "p99_latency", seconds), and the retrieval, egress and
+            total dollar cost.
+        """
+        egress_cost = self.bytes_served / GB * self.costs.egress_cost_per_gb
+        p50, p99 = self.latency_percentiles([50, 99])
+        return {
+            "bytes_served": self.bytes_served,
+            "cold_reads": self.cold_reads,
+            "cold_bytes": self.cold_bytes,
+            "promotions": self.promotions,
+            "bytes_moved": self.bytes_moved,
+            "p50_latency": p50,
+            "p99_latency": p99,
+            "retrieval_cost": self.retrieval_cost,
+            "egress_cost": egress_cost,
+            "cost": self.retrieval_cost + egress_cost,
+        }
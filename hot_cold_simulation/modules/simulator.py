@@ -1,13 +1,58 @@
 import concurrent.futures
-import pickle
+import warnings
 from multiprocessing import cpu_count
-from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
-from modules.combination_cache import CombinationCache
-from modules.lru_cache import LRUCache  # type: ignore
-from modules.time_cache import TimeCache
+from modules.array_lru_cache import NUM_SCENES
+from modules.batched_engine import BatchedEngine
+from modules.cache_registry import create_cache
+from modules.compiled_engine import POLICIES, CompiledEngine
+from modules.defaults import DEFAULT_BACKEND
+from modules.jit import NUMBA_AVAILABLE
+from modules.probability_paths import generate_path_requests, load_probability_paths
+from modules.scenario import ScenarioData, load_scenario_data
+from modules.scene_costs import CostLedger, SceneCosts
+from modules.shards import estimate_miss_ratio_curve
+from modules.stack_distance import replay_lru_capacities
+from modules.stochastic_workload import load_stochastic_demand
+from modules.workload import generate_requests, run_streams
+
+BACKENDS = ("thread", "process", "serial")
+
+ENGINES = ("python", "numba", "batched")
+
+WORKLOADS = ("uniform", "stochastic", "paths")
+
+# Scenario dataset handed to each process pool worker once by `_init_worker`.
+_WORKER_DATA: Dict[str, Any] = {}
+
+
+def _init_worker(scenario: ScenarioData) -> None:
+    """Store the scenario dataset in the worker process.
+
+    Args:
+        scenario (ScenarioData): Footprints shared by every run of the worker.
+    """
+    _WORKER_DATA["scenario"] = scenario
+
+
+def _run_worker_chunk(
+    settings: Dict[str, Any], seeds: List[np.random.SeedSequence]
+) -> np.ndarray:
+    """Execute a chunk of simulation runs inside a process pool worker.
+
+    Args:
+        settings (Dict[str, Any]): Keyword arguments used to build the simulator.
+        seeds (List[np.random.SeedSequence]): One seed sequence per run.
+
+    Returns:
+        np.ndarray: Result of every run in the chunk, in the order of `seeds`.
+    """
+    simulator = MonteCarloSimulation(
+        **settings, scenario=_WORKER_DATA["scenario"], backend="serial"
+    )
+    return simulator.run_seeded_simulations(seeds)
 
 
 class MonteCarloSimulation:
@@ -19,6 +64,13 @@ class MonteCarloSimulation:
         param,
         prepopulate_cache: bool = False,
         return_type: str = "requests",
+        backend: str = DEFAULT_BACKEND,
+        max_workers: Optional[int] = None,
+        scenario: Optional[ScenarioData] = None,
+        record_history: bool = False,
+        engine: str = "python",
+        workload: str = "uniform",
+        costs: Optional[SceneCosts] = None,
     ) -> None:
         """_summary_
 
@@ -27,107 +79,467 @@ class MonteCarloSimulation:
             num (int): _description_
             hot_layer_constraint (_type_): _description_
             preload_data (bool, optional): _description_. Defaults to False.
+            backend (str, optional): Executor used by `monte_carlo_simulation`. One of
+                'thread', 'process' or 'serial'. Defaults to `DEFAULT_BACKEND`.
+            max_workers (Optional[int], optional): Number of pool workers. Defaults to
+                the number of CPUs.
+            scenario (Optional[ScenarioData], optional): Footprint dataset shared by
+                reference. Defaults to the dataset loaded once per process.
+            record_history (bool, optional): Record the cache membership after every
+                request in `run_simulation`. Defaults to False.
+            engine (str, optional): 'numba' runs seeded runs in batches inside the
+                compiled kernels of `compiled_engine`, falling back to 'python' when
+                Numba is not installed. 'batched' advances the caches of a batch of
+                runs in lockstep with NumPy. Defaults to 'python'.
+            workload (str, optional): 'uniform' draws every feature of a scale with
+                equal probability, 'stochastic' draws them from moving spatial hotspots
+                (see `stochastic_workload`) and 'paths' draws request `i` from step `i`
+                of the precomputed paths in `stochastic_paths` (see
+                `probability_paths`). Defaults to 'uniform'.
+            costs (Optional[SceneCosts], optional): Scene sizes and cold retrieval
+                costs and latencies used by `monte_carlo_costs`. Defaults to
+                `SceneCosts.uniform()`.
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend. Use one of {BACKENDS}.")
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine. Use one of {ENGINES}.")
+        if workload not in WORKLOADS:
+            raise ValueError(f"Invalid workload. Use one of {WORKLOADS}.")
+        if engine == "numba" and not NUMBA_AVAILABLE:
+            warnings.warn(
+                "Numba is not installed, using the Python engine instead.", stacklevel=2
+            )
+            engine = "python"
+        if engine != "python" and cache_type not in POLICIES:
+            warnings.warn(
+                f"The {engine} engine does not support {cache_type}, "
+                "using the Python engine instead.",
+                stacklevel=2,
+            )
+            engine = "python"
         self.weights = weights
         self.num = num
+        self.cache_type = cache_type
+        self.param = param
+        self.prepopulate_cache = prepopulate_cache
         self.return_type = return_type
-        if cache_type == "LRUCache":
-            self.cache = LRUCache(param, prepopulate_cache)
-        elif cache_type == "TimeCache":
-            self.cache = TimeCache(param)
-        elif cache_type == "CombinationCache":
-            self.cache = CombinationCache(param, prepopulate=prepopulate_cache)
+        self.backend = backend
+        self.max_workers = max_workers or cpu_count()
+        self.record_history = record_history
+        self.engine = engine
+        self.workload = workload
+        self.costs = SceneCosts.uniform() if costs is None else costs
+        self.cache = self.create_cache()
+        self.scenario = load_scenario_data() if scenario is None else scenario
+        self.batch_engine: Optional[CompiledEngine] = None
+
+    def create_cache(self, rng: Optional[np.random.Generator] = None) -> Any:
+        """Build a new, empty (or prepopulated) cache of the configured type.
+
+        Args:
+            rng (Optional[np.random.Generator], optional): Generator used to prepopulate
+                the cache. Defaults to the global `random` state.
+
+        Returns:
+            Any: The cache instance, built by the `cache_registry` entry of
+            `cache_type`.
+        """
+        return create_cache(self.cache_type, self.param, self.prepopulate_cache, rng)
+
+    def settings(self) -> Dict[str, Any]:
+        """Keyword arguments needed to rebuild this simulator in another process."""
+        return {
+            "weights": self.weights,
+            "num": self.num,
+            "cache_type": self.cache_type,
+            "param": self.param,
+            "prepopulate_cache": self.prepopulate_cache,
+            "return_type": self.return_type,
+            "engine": self.engine,
+            "workload": self.workload,
+        }
+
+    def draw_requests(self, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw the `num` (scale, feature) requests of one run from the workload.
+
+        Args:
+            rng (np.random.Generator): Generator the requests are drawn from.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Scale indices and feature indices.
+        """
+        if self.workload == "stochastic":
+            demand = load_stochastic_demand(tuple(self.scenario.feature_counts))
+            return demand.generate_requests(rng, self.weights, self.num)
+        if self.workload == "paths":
+            # Only the scales that can be drawn need a path
+            scales = tuple(i for i, weight in enumerate(self.weights) if weight > 0)
+            return generate_path_requests(
+                rng,
+                self.weights,
+                load_probability_paths(scales),
+                self.scenario.feature_counts,
+                self.num,
+            )
+        return generate_requests(
+            rng, self.weights, self.scenario.feature_counts, self.num
+        )
+
+    def monte_carlo_simulation(self, num_runs: int, seed: Optional[int] = None) -> Any:
+        """Execute the Monte Carlo simulation for a specified number of runs.
+
+        Every run owns its cache and its own random streams spawned from `seed`, so
+        runs are independent regardless of the backend. Run `i` only depends on `seed`
+        and `i`, so simulators built with the same seed replay the same requests and
+        prepopulation across weights and parameters (common random numbers). The
+        'process' backend ships the scenario dataset to each worker once and hands out
+        runs in chunks. With a batch engine the 'thread' backend replays all runs as
+        one batch, since the GIL would serialize the threads anyway.
+
+        Args:
+            num_runs (int): Number of simulation runs.
+            seed (Optional[int], optional): Entropy for the run streams. Defaults to
+                None.
+
+        Returns:
+            np.ndarray: Result of every run, ordered by run index.
+        """
+        seeds = np.random.SeedSequence(seed).spawn(num_runs)
+
+        if self.backend == "serial" or (
+            self.backend == "thread" and self.engine != "python"
+        ):
+            return self.run_seeded_simulations(seeds)
+
+        if self.backend == "thread":
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers
+            ) as executor:
+                results = list(executor.map(self.run_seeded_simulation, seeds))
+            return np.asarray(results, dtype=np.float64)
+
+        chunks = [
+            chunk.tolist()
+            for chunk in np.array_split(np.array(seeds, dtype=object), self.max_workers)
+            if len(chunk)
+        ]
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=len(chunks),
+            initializer=_init_worker,
+            initargs=(self.scenario,),
+        ) as executor:
+            futures = [
+                executor.submit(_run_worker_chunk, self.settings(), chunk)
+                for chunk in chunks
+            ]
+            return np.concatenate([f.result() for f in futures])
+
+    def run_seeded_simulation(self, seed: np.random.SeedSequence) -> float:
+        """Execute a single run with a fresh cache and its own random stream.
+
+        Args:
+            seed (np.random.SeedSequence): Seed sequence of the run.
+
+        Returns:
+            float: Result of the run according to `return_type`.
+        """
+        if self.engine != "python" and not self.record_history:
+            return float(self.run_batch_simulations([seed])[0])
+        prepopulate_rng, workload_rng = run_streams(seed)
+        result, _ = self.run_simulation(
+            cache=self.create_cache(prepopulate_rng), rng=workload_rng
+        )
+        return result
+
+    def run_seeded_simulations(self, seeds: List[np.random.SeedSequence]) -> np.ndarray:
+        """Execute one run per seed sequence, one after the other.
+
+        Args:
+            seeds (List[np.random.SeedSequence]): Seed sequence of each run.
+
+        Returns:
+            np.ndarray: Result of every run, in the order of `seeds`.
+        """
+        if self.engine != "python" and not self.record_history:
+            return self.run_batch_simulations(seeds)
+        return np.fromiter(
+            (self.run_seeded_simulation(seed) for seed in seeds),
+            dtype=np.float64,
+            count=len(seeds),
+        )
+
+    def run_batch_simulations(self, seeds: List[np.random.SeedSequence]) -> np.ndarray:
+        """Execute one run per seed sequence as one batch of the selected engine.
+
+        Args:
+            seeds (List[np.random.SeedSequence]): Seed sequence of each run.
+
+        Returns:
+            np.ndarray: Result of every run, in the order of `seeds`.
+        """
+        if self.batch_engine is None:
+            engine_class = CompiledEngine if self.engine == "numba" else BatchedEngine
+            self.batch_engine = engine_class(
+                self.scenario.footprints,
+                self.cache_type,
+                self.param,
+                self.prepopulate_cache,
+            )
+        metrics = self.batch_engine.replay(
+            self.weights,
+            self.scenario.feature_counts,
+            self.num,
+            seeds,
+            draw_requests=self.draw_requests,
+        )
+        free_requests, free_scenes, total_scenes = metrics.T
+        if self.return_type == "ratio":
+            return np.divide(
+                free_scenes,
+                total_scenes,
+                out=np.zeros(len(seeds)),
+                where=total_scenes > 0,
+            )
+        elif self.return_type == "requests":
+            return free_requests.astype(np.float64)
+        elif self.return_type == "scenes":
+            return free_scenes.astype(np.float64)
         else:
-            raise ValueError("Invalid cache type. Use 'LRUCache' or 'TimeCache'.")
-        self.load_data()
+            raise ValueError("Invalid return type specified")
+
+    def run_seeded_costs(self, seed: np.random.SeedSequence) -> Dict[str, float]:
+        """Execute a single run like `run_seeded_simulation` and account its costs.
+
+        Args:
+            seed (np.random.SeedSequence): Seed sequence of the run.
 
-    def load_dict_from_file(self, filename: str) -> Dict:
-        current_dir = Path.cwd()
-        data_dicts = (Path(current_dir) / "dictionaries").resolve()
-        """Load dictionary from a file."""
-        with Path.open(data_dicts / filename, "rb") as f:
-            return pickle.load(f)
+        Returns:
+            Dict[str, float]: Free requests, free scenes and total scenes of the run,
+            and the totals of `CostLedger.totals`.
+        """
+        prepopulate_rng, workload_rng = run_streams(seed)
+        scales, features = self.draw_requests(workload_rng)
+        ledger = CostLedger(self.costs)
+        free_requests, free_scenes, total_scenes = self.replay_requests(
+            self.create_cache(prepopulate_rng), scales, features, ledger=ledger
+        )
+        return {
+            "requests": free_requests,
+            "scenes": free_scenes,
+            "total_scenes": total_scenes,
+            **ledger.totals(),
+        }
 
-    def load_data(self) -> None:
-        """Load data from the pickled dictionaries."""
-        self.regions_data = self.load_dict_from_file("divisions_mapping.pkl")
-        self.states_data = self.load_dict_from_file("states_mapping.pkl")
-        self.counties_data = self.load_dict_from_file("counties_mapping.pkl")
+    def monte_carlo_costs(
+        self, num_runs: int, seed: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """Execute `num_runs` runs with cost accounting, one after the other.
 
-    def fetch_data(self, data: dict, count: int) -> dict[Any, Any]:
-        """Fetch a subset of items from a dictionary.
+        The runs use the seeds of `monte_carlo_simulation` with the same `seed`, so
+        their free requests match its results run by run. Costs are always accounted
+        with the Python caches.
 
         Args:
-            data (dict): Source dictionary.
-            count (int): Maximum number of items to retrieve.
+            num_runs (int): Number of simulation runs.
+            seed (Optional[int], optional): Entropy for the run streams. Defaults to
+                None.
 
         Returns:
-            dict: A subset of the dictionary.
+            Dict[str, np.ndarray]: Every metric of `run_seeded_costs`, one value per
+            run.
         """
-        # Since dictionaries are unordered, we'll convert the dictionary to a list of items,
-        # take the first 'count' items, and then convert it back to a dictionary.
-        return dict(list(data.items())[:count])
+        runs = [
+            self.run_seeded_costs(run_seed)
+            for run_seed in np.random.SeedSequence(seed).spawn(num_runs)
+        ]
+        return {
+            metric: np.array([run[metric] for run in runs], dtype=np.float64)
+            for metric in (runs[0] if runs else {})
+        }
 
-    def monte_carlo_simulation(self, num_runs: int) -> list:
-        """Execute the Monte Carlo simulation for a specified number of runs using parallel threads.
+    def run_capacity_sweep(
+        self, capacities: Sequence[int], seed: np.random.SeedSequence
+    ) -> np.ndarray:
+        """Replay one seeded run against an LRU cache of every capacity at once.
+
+        The requests and prepopulated scenes are drawn exactly as in
+        `run_seeded_simulation`, so the result for capacity `c` equals the result of
+        that run with `cache_type="LRUCache"` and `param=c`.
 
         Args:
-            num_runs (int): _description_
+            capacities (Sequence[int]): Cache capacities to evaluate.
+            seed (np.random.SeedSequence): Seed sequence of the run.
 
         Returns:
-            float: _description_
+            np.ndarray: Result of the run for each capacity according to `return_type`.
         """
+        if self.return_type not in ("ratio", "requests", "scenes"):
+            raise ValueError("Invalid return type specified")
+        prepopulate_rng, workload_rng = run_streams(seed)
+        order = (
+            prepopulate_rng.permutation(NUM_SCENES) if self.prepopulate_cache else None
+        )
+        scales, features = self.draw_requests(workload_rng)
+        metrics = replay_lru_capacities(
+            self.scenario.footprints, scales, features, capacities, order
+        )
+        return metrics[self.return_type].astype(np.float64)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=cpu_count()) as executor:
-            # Use a loop to run the simulation num_runs times
-            futures = [executor.submit(self.run_simulation) for _ in range(num_runs)]
+    def run_seeded_capacity_sweeps(
+        self, capacities: Sequence[int], seeds: List[np.random.SeedSequence]
+    ) -> np.ndarray:
+        """Execute `run_capacity_sweep` once per seed sequence.
 
-            results = []
-            for _i, f in enumerate(concurrent.futures.as_completed(futures), 1):
-                free_requests, _ = f.result()  # Extract only the free_requests_count
-                results.append(free_requests)
+        Args:
+            capacities (Sequence[int]): Cache capacities to evaluate.
+            seeds (List[np.random.SeedSequence]): Seed sequence of each run.
 
+        Returns:
+            np.ndarray: Results indexed by (capacity, run).
+        """
+        results = np.empty((len(capacities), len(seeds)))
+        for run, seed in enumerate(seeds):
+            results[:, run] = self.run_capacity_sweep(capacities, seed)
         return results
 
-    def run_simulation(self) -> Tuple[int, List[Any]]:
-        """Execute the simulation.
+    def estimate_miss_ratio_curve(
+        self,
+        seed: Optional[np.random.SeedSequence] = None,
+        capacities: Optional[Sequence[int]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, np.ndarray]:
+        """Estimate the LRU scene miss ratio of every capacity for one long stream.
+
+        Draws `self.num` requests (and the prepopulated scenes) like
+        `run_seeded_simulation`, then samples them with `estimate_miss_ratio_curve`
+        from `modules.shards` instead of replaying them, which keeps streams of
+        millions of requests tractable.
+
+        Args:
+            seed (Optional[np.random.SeedSequence], optional): Seed sequence of the
+                run. Defaults to fresh entropy.
+            capacities (Optional[Sequence[int]], optional): Cache capacities. Defaults
+                to 1 to 886.
+            **kwargs (Any): Sampling options such as `rate`, `num_salts` and
+                `confidence`.
 
         Returns:
-            Tuple[int, List[Any]]: Tuple containing total count of free requests and history.
+            Dict[str, np.ndarray]: Capacities, estimated miss ratio and its bounds.
+        """
+        seed = np.random.SeedSequence() if seed is None else seed
+        prepopulate_rng, workload_rng = run_streams(seed)
+        order = (
+            prepopulate_rng.permutation(NUM_SCENES) if self.prepopulate_cache else None
+        )
+        scales, features = self.draw_requests(workload_rng)
+        return estimate_miss_ratio_curve(
+            self.scenario.footprints,
+            scales,
+            features,
+            capacities,
+            prepopulate_order=order,
+            **kwargs,
+        )
+
+    def replay_requests(
+        self,
+        cache: Any,
+        scales: np.ndarray,
+        features: np.ndarray,
+        history: Optional[np.ndarray] = None,
+        ledger: Optional[CostLedger] = None,
+    ) -> Tuple[int, int, int]:
+        """Replay requests against a cache, which keeps its state for later calls.
+
+        Args:
+            cache (Any): Cache the scenes are looked up in and moved to.
+            scales (np.ndarray): Scale index of each request.
+            features (np.ndarray): Feature index of each request.
+            history (Optional[np.ndarray], optional): Requests x scenes matrix filled
+                with the cache membership after each request. Defaults to None.
+            ledger (Optional[CostLedger], optional): Ledger the cold reads, promotions,
+                latency and cost of every request are recorded in. Defaults to None.
+
+        Returns:
+            Tuple[int, int, int]: Free requests, free scenes and total scenes.
         """
         free_scenes = 0
         total_scenes = 0
         free_requests = 0
-        history: List[Any] = []
-
-        # Fetch subset of data
-        regions_subset = self.fetch_data(self.regions_data, 9)
-        states_subset = self.fetch_data(self.states_data, 49)
-        counties_subset = self.fetch_data(self.counties_data, 4437)
-
-        for _ in range(self.num):
-            scale = np.random.choice(["regions", "states", "counties"], p=self.weights)
-            if scale == "regions":
-                data = regions_subset
-            elif scale == "states":
-                data = states_subset
-            else:
-                data = counties_subset
-            feature_id = np.random.choice(list(data.keys()))
-            landsat_scenes = data[feature_id]
+
+        footprints = self.scenario.footprints
+        # Offline policies such as `BeladyCache` are handed the whole stream first
+        if hasattr(cache, "plan"):
+            cache.plan(
+                [
+                    footprints[scale][feature]
+                    for scale, feature in zip(scales.tolist(), features.tolist())
+                ]
+            )
+
+        for i, (scale, feature) in enumerate(zip(scales.tolist(), features.tolist())):
+            landsat_scenes = footprints[scale][feature].tolist()
             moved_to_hot = False
+            missed: List[int] = []
 
             for scene in landsat_scenes:
                 total_scenes += 1
-                if self.cache.get(scene) != -1:  # is found
+                if cache.get(scene) != -1:  # is found
                     free_scenes += 1
-                elif self.cache.get(scene) == -1:  # is not found
+                elif cache.get(scene) == -1:  # is not found
                     moved_to_hot = True
+                    missed.append(scene)
 
             if not moved_to_hot:
                 free_requests += 1
-            self.cache.put(landsat_scenes)
-            history.append(self.cache.current_state())
+            cache.put(landsat_scenes)
+            if ledger is not None:
+                # Admission-aware caches may read a missed scene without caching it
+                promoted = [scene for scene in missed if cache.get(scene) != -1]
+                ledger.record(landsat_scenes, missed, promoted)
+            if history is not None:
+                history[i, cache.current_state()] = True
+
+        return free_requests, free_scenes, total_scenes
+
+    def run_simulation(
+        self,
+        cache: Any = None,
+        rng: Optional[np.random.Generator] = None,
+        requests: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """Execute the simulation.
+
+        Args:
+            cache (Any, optional): Cache to replay the requests against. Defaults to
+                `self.cache`.
+            rng (Optional[np.random.Generator], optional): Generator used to draw the
+                requests. Defaults to a freshly seeded generator.
+            requests (Optional[Tuple[np.ndarray, np.ndarray]], optional): Precomputed
+                scale and feature indices, as returned by `draw_requests`. Defaults to
+                drawing `self.num` requests from `rng`.
+
+        Returns:
+            Tuple[int, Optional[np.ndarray]]: Tuple containing total count of free
+            requests and history. When `record_history` is set, the history is a
+            requests x scenes boolean matrix of the cache membership after each request,
+            otherwise it is None.
+        """
+        cache = self.cache if cache is None else cache
+
+        if requests is None:
+            rng = np.random.default_rng() if rng is None else rng
+            requests = self.draw_requests(rng)
+        scales, features = requests
+        history = (
+            np.zeros((len(scales), NUM_SCENES), dtype=bool)
+            if self.record_history
+            else None
+        )
+        free_requests, free_scenes, total_scenes = self.replay_requests(
+            cache, scales, features, history
+        )
 
         free_ratio = free_scenes / total_scenes if total_scenes > 0 else 0
 
@@ -0,0 +1,97 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+from modules.footprint_index import FootprintIndex
+
+# Depth of scenes that are not in the recency stack yet.
+UNSEEN = np.iinfo(np.int64).max
+
+
+def replay_lru_capacities(
+    footprints: Sequence[FootprintIndex],
+    scales: np.ndarray,
+    features: np.ndarray,
+    capacities: Sequence[int],
+    prepopulate_order: Optional[np.ndarray] = None,
+    num_scenes: int = NUM_SCENES,
+) -> Dict[str, np.ndarray]:
+    """Replay a request stream once against an `LRUCache` of every capacity.
+
+    All capacities share one recency stack of the scenes, and a cache of capacity `c`
+    always holds the `m_c` most recent scenes of it. `LRUCache.put` evicts the least
+    recently used scene whenever the cache is full, even if the incoming scene is
+    already cached, so `m_c` is not simply `min(c, stack size)`: once a put finds the
+    cache full, the size after a put is `c - 1`, plus one when the last inserted scene
+    was at depth `c` or deeper before being touched. Until then `m_c` is the stack
+    size. A scene hits when its depth before the request is at most `m_c`, and a
+    request is free when all of its scenes hit, as in `run_simulation`.
+
+    Args:
+        footprints (Sequence[FootprintIndex]): Scene footprints of each scale.
+        scales (np.ndarray): Scale index of each request.
+        features (np.ndarray): Feature index of each request.
+        capacities (Sequence[int]): Cache capacities to evaluate.
+        prepopulate_order (Optional[np.ndarray], optional): Permutation of the scenes
+            the caches are prepopulated from, most recent first, as done by
+            `LRUCache.prepopulate_cache`. Defaults to empty caches.
+        num_scenes (int, optional): Number of scenes. Defaults to 886.
+
+    Returns:
+        Dict[str, np.ndarray]: Free requests ("requests"), free scenes ("scenes") and
+        free scene ratio ("ratio") of each capacity.
+    """
+    caps = np.asarray(capacities, dtype=np.int64)
+    last_access = np.full(num_scenes, -1, dtype=np.int64)
+    if prepopulate_order is None:
+        size = np.zeros(len(caps), dtype=np.int64)
+    else:
+        order = np.asarray(prepopulate_order, dtype=np.int64)
+        last_access[order] = np.arange(len(order))[::-1]
+        size = np.minimum(caps, len(order))
+    clock = int(last_access.max()) + 1
+    stack_size = int(np.count_nonzero(last_access >= 0))
+    saturated = size >= caps - 1
+
+    free_requests = np.zeros(len(caps), dtype=np.int64)
+    free_scenes = np.zeros(len(caps), dtype=np.int64)
+    total_scenes = 0
+
+    for scale, feature in zip(scales.tolist(), features.tolist()):
+        keys = np.asarray(footprints[scale][feature], dtype=np.int64)
+        count = len(keys)
+        if count == 0:
+            free_requests += 1
+            continue
+
+        # Depth of each scene in the recency stack before the request (1 = most recent).
+        stamps = last_access[keys]
+        seen = stamps >= 0
+        stack = np.sort(last_access[last_access >= 0])
+        depth = np.full(count, UNSEEN, dtype=np.int64)
+        depth[seen] = stack_size - np.searchsorted(stack, stamps[seen])
+
+        # Hits and the all-scenes-hit rule for every capacity at once.
+        sorted_depth = np.sort(depth)
+        free_scenes += np.searchsorted(sorted_depth, size, side="right")
+        free_requests += sorted_depth[-1] <= size
+        total_scenes += count
+
+        # Size of every cache after the put. Only the depth of the last key matters
+        # once a cache is at least `c - 1` full; keys touched before it that were
+        # deeper in the stack move above it.
+        last = depth[-1]
+        if last != UNSEEN:
+            last += np.count_nonzero(depth[:-1] > last)
+        new = np.count_nonzero(~seen)
+        saturated |= stack_size + new - int(not seen[-1]) >= caps - 1
+        size = np.where(
+            saturated, caps - 1 + (last >= caps), np.minimum(stack_size + new, caps)
+        )
+
+        last_access[keys] = np.arange(clock, clock + count)
+        clock += count
+        stack_size += new
+
+    ratio = free_scenes / total_scenes if total_scenes > 0 else np.zeros(len(caps))
+    return {"requests": free_requests, "scenes": free_scenes, "ratio": ratio}
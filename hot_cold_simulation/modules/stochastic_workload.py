@@ -0,0 +1,344 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+from modules.workload import SCALES
+
+STOCHASTIC_DIR = "stochastic_paths"
+
+# Shapefile of each scale in `SCALES` order, relative to the data directory.
+SHAPEFILES = (
+    ("USA_Divisions", "usa_divisions.shp"),
+    ("USA_States", "usa_states.shp"),
+    ("USA_Counties", "usa_counties.shp"),
+)
+
+# Nearest neighbours of the adaptive Gaussian kernel of each scale.
+KERNEL_NEIGHBOURS = (2, 3, 45)
+
+# Probability every feature keeps at every step.
+BASE_PROB = 1e-6
+
+# Range of the number of steps over which a hotspot fades out.
+MIN_LAG = 3
+MAX_LAG = 10
+
+
+class KernelMatrix:
+    """CSR-packed spatial kernel weights between the features of one scale.
+
+    Row `i` holds the kernel weights of the neighbours of feature `i`, i.e. the demand
+    a hotspot centred on feature `i` puts on the features around it.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        """Wrap already packed arrays.
+
+        Args:
+            indptr (np.ndarray): `rows + 1` start offsets into `indices` and `data`.
+            indices (np.ndarray): Column (feature) of each weight.
+            data (np.ndarray): Kernel weights.
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def head(self, count: int) -> "KernelMatrix":
+        """Return the matrix restricted to the columns of the first `count` features."""
+        keep = self.indices < count
+        kept = np.concatenate([[0], np.cumsum(keep)])
+        return KernelMatrix(kept[self.indptr], self.indices[keep], self.data[keep])
+
+    def row_sums(self) -> np.ndarray:
+        """Return the total weight of every row."""
+        cumulative = np.concatenate([[0.0], np.cumsum(self.data)])
+        return cumulative[self.indptr[1:]] - cumulative[self.indptr[:-1]]
+
+    @classmethod
+    def from_geometries(cls, gdf: Any, k: int) -> "KernelMatrix":
+        """Build the adaptive Gaussian kernel of a GeoDataFrame with libpysal.
+
+        Args:
+            gdf (Any): GeoDataFrame of the features, in feature index order.
+            k (int): Number of nearest neighbours of the adaptive bandwidth.
+
+        Returns:
+            KernelMatrix: The packed kernel.
+        """
+        from libpysal.weights import Kernel  # type: ignore
+
+        kernel = Kernel.from_dataframe(gdf, k=k, fixed=False, function="gaussian")
+        sparse = kernel.sparse.tocsr()
+        sparse.sort_indices()
+        return cls(
+            sparse.indptr.astype(np.int64),
+            sparse.indices.astype(np.int64),
+            sparse.data.astype(np.float64),
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the matrix as an `.npz` file."""
+        path.parent.mkdir(exist_ok=True, parents=True)
+        np.savez(path, indptr=self.indptr, indices=self.indices, data=self.data)
+
+    @classmethod
+    def load(cls, path: Path) -> "KernelMatrix":
+        """Open a matrix written by `save`."""
+        with np.load(path) as arrays:
+            return cls(arrays["indptr"], arrays["indices"], arrays["data"])
+
+
+def read_scale_geometries(data_dir: Path, scale: int) -> Any:
+    """Read the features of a scale in the order of its footprint mapping."""
+    import geopandas as gpd  # type: ignore
+
+    folder, filename = SHAPEFILES[scale]
+    gdf = gpd.read_file(data_dir / folder / filename)
+    return gpd.GeoDataFrame(geometry=gdf.geometry.values, crs="EPSG:4326")
+
+
+@lru_cache(maxsize=None)
+def load_kernel_matrices(
+    cache_dir: Optional[str] = None, data_dir: Optional[str] = None
+) -> Tuple[KernelMatrix, ...]:
+    """Load the kernel matrix of every scale once per process.
+
+    A matrix missing from `<cache_dir>/<scale>_kernel.npz` is built from the scale's
+    shapefile with libpysal and written there, so the kernels are only built once.
+
+    Args:
+        cache_dir (Optional[str], optional): Directory of the cached kernels. Defaults
+            to `./stochastic_paths` in the current working directory.
+        data_dir (Optional[str], optional): Directory of the shapefiles. Defaults to
+            `DATA_DIR`.
+
+    Returns:
+        Tuple[KernelMatrix, ...]: Kernel of each scale in `SCALES` order.
+    """
+    cache = Path(cache_dir or Path.cwd() / STOCHASTIC_DIR).resolve()
+    kernels = []
+    for scale, (name, k) in enumerate(zip(SCALES, KERNEL_NEIGHBOURS)):
+        path = cache / f"{name}_kernel.npz"
+        if not path.exists():
+            from modules.config import DATA_DIR  # type: ignore
+
+            data = Path(data_dir or DATA_DIR).resolve()
+            KernelMatrix.from_geometries(read_scale_geometries(data, scale), k).save(
+                path
+            )
+        kernels.append(KernelMatrix.load(path))
+    return tuple(kernels)
+
+
+class StochasticDemand:
+    """Spatially correlated workload whose feature demand follows moving hotspots.
+
+    At every step a random feature becomes a hotspot: the kernel row of that feature
+    is added to the demand of the step and then fades out linearly over the next
+    `MIN_LAG` to `MAX_LAG` steps, on top of `2 * BASE_PROB` for every feature. Request
+    `t` of a scale is drawn from the demand of step `t` of that scale.
+
+    The demand of a step is a mixture of the base and the few kernel rows still
+    active, so requests are sampled without building the dense (steps x features)
+    probability paths: the component is picked by inverse CDF over the component
+    masses, then the feature by inverse CDF over the cumulative weights of the row.
+    """
+
+    def __init__(
+        self,
+        kernels: Sequence[KernelMatrix],
+        feature_counts: Sequence[int],
+        base_prob: float = BASE_PROB,
+        min_lag: int = MIN_LAG,
+        max_lag: int = MAX_LAG,
+    ) -> None:
+        """Restrict the kernels to the simulated features.
+
+        Args:
+            kernels (Sequence[KernelMatrix]): Kernel of each scale.
+            feature_counts (Sequence[int]): Number of features of each scale. Hotspots
+                can be centred on any feature of the kernel, but requests only go to
+                the first `feature_counts` features.
+            base_prob (float, optional): Base demand. Defaults to `BASE_PROB`.
+            min_lag (int, optional): Shortest fade out. Defaults to `MIN_LAG`.
+            max_lag (int, optional): Longest fade out. Defaults to `MAX_LAG`.
+        """
+        self.kernels = [
+            kernel.head(count) for kernel, count in zip(kernels, feature_counts)
+        ]
+        self.feature_counts = tuple(feature_counts)
+        self.base_prob = base_prob
+        self.min_lag = min_lag
+        self.max_lag = max_lag
+        self.row_sums = [kernel.row_sums() for kernel in self.kernels]
+        self.cumulative = [
+            np.concatenate([[0.0], np.cumsum(kernel.data)]) for kernel in self.kernels
+        ]
+
+    def hotspots(
+        self, rng: np.random.Generator, scale: int, shape: Tuple[int, ...]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw the hotspot feature and fade out length of every step of a scale."""
+        centres = rng.integers(len(self.kernels[scale]), size=shape)
+        lags = rng.integers(self.min_lag, self.max_lag + 1, size=shape)
+        return centres, lags
+
+    def component_masses(
+        self, centres: np.ndarray, lags: np.ndarray, scale: int
+    ) -> np.ndarray:
+        """Return the mass of every component of the demand at every step.
+
+        Args:
+            centres (np.ndarray): Hotspot feature of each step, shaped (..., steps).
+            lags (np.ndarray): Fade out length of each step, shaped (..., steps).
+            scale (int): Scale index.
+
+        Returns:
+            np.ndarray: Shaped (..., steps, max_lag + 2). Column `d` is the mass of the
+            hotspot of `d` steps earlier and the last column the base demand.
+        """
+        steps = centres.shape[-1]
+        offsets = np.arange(self.max_lag + 1)
+        origin = np.arange(steps)[:, None] - offsets
+        before = np.maximum(origin, 0)
+        lag = lags[..., before]
+        weight = np.where(offsets == 0, 1.0, np.where(offsets <= lag, 1.0 / lag, 0.0))
+        weight = np.where(origin >= 0, weight, 0.0)
+        masses = weight * self.row_sums[scale][centres[..., before]]
+        base = np.full(
+            (*masses.shape[:-1], 1), 2 * self.base_prob * self.feature_counts[scale]
+        )
+        return np.concatenate([masses, base], axis=-1)
+
+    def demand_paths(
+        self, centres: np.ndarray, lags: np.ndarray, scale: int
+    ) -> np.ndarray:
+        """Return the dense probability path of one run of a scale.
+
+        Sampling never builds the paths; they are only needed to inspect or plot the
+        demand. The kernel rows of every active hotspot are scattered into the
+        (features x steps) matrix in one sparse operation.
+
+        Args:
+            centres (np.ndarray): Hotspot feature of each step.
+            lags (np.ndarray): Fade out length of each step.
+            scale (int): Scale index.
+
+        Returns:
+            np.ndarray: Probability of each feature at each step, shaped (features,
+            steps), every column summing to one.
+        """
+        kernel = self.kernels[scale]
+        weights = self.component_masses(centres, lags, scale)[:, :-1]
+        steps, offsets = np.nonzero(weights)
+        origin = centres[steps - offsets]
+        weights = weights[steps, offsets] / self.row_sums[scale][origin]
+        start = kernel.indptr[origin]
+        count = kernel.indptr[origin + 1] - start
+        position = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        entries = np.repeat(start, count) + position
+
+        paths = np.full((self.feature_counts[scale], len(centres)), 2 * self.base_prob)
+        np.add.at(
+            paths,
+            (kernel.indices[entries], np.repeat(steps, count)),
+            np.repeat(weights, count) * kernel.data[entries],
+        )
+        return paths / paths.sum(axis=0)
+
+    def sample_features(
+        self,
+        rng: np.random.Generator,
+        masses: np.ndarray,
+        centres: np.ndarray,
+        scale: int,
+    ) -> np.ndarray:
+        """Draw one feature per step from the mixture described by `masses`.
+
+        Args:
+            rng (np.random.Generator): Generator the uniforms are drawn from.
+            masses (np.ndarray): Component masses of the steps, shaped (n, max_lag + 2).
+            centres (np.ndarray): Hotspot of each component, shaped (n, max_lag + 1).
+            scale (int): Scale index.
+
+        Returns:
+            np.ndarray: Feature index of each step.
+        """
+        kernel = self.kernels[scale]
+        uniforms = rng.random((2, len(masses)))
+        cdf = np.cumsum(masses, axis=1)
+        component = np.count_nonzero(cdf <= (uniforms[0] * cdf[:, -1])[:, None], axis=1)
+        component = np.minimum(component, masses.shape[1] - 1)
+        is_base = component == masses.shape[1] - 1
+
+        features = np.minimum(
+            (uniforms[1] * self.feature_counts[scale]).astype(np.int64),
+            self.feature_counts[scale] - 1,
+        )
+        # Inverse CDF within the kernel row, on the cumulative weights of all rows.
+        hotspot = np.minimum(component, centres.shape[1] - 1)
+        rows = centres[np.arange(len(masses)), hotspot]
+        start, stop = kernel.indptr[rows], kernel.indptr[rows + 1]
+        cumulative = self.cumulative[scale]
+        target = cumulative[start] + uniforms[1] * self.row_sums[scale][rows]
+        position = np.searchsorted(cumulative, target, side="right") - 1
+        position = np.clip(position, start, np.maximum(stop - 1, start))
+        position = np.minimum(position, len(kernel.indices) - 1)
+        return np.where(is_base, features, kernel.indices[position])
+
+    def generate_requests(
+        self,
+        rng: np.random.Generator,
+        weights: Sequence[float],
+        num: int,
+        num_runs: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw a whole stream of (scale, feature) requests with moving hotspots.
+
+        The scales are drawn as in `generate_requests`; every run and scale gets its
+        own hotspot path over the `num` steps.
+
+        Args:
+            rng (np.random.Generator): Generator the draws come from.
+            weights (Sequence[float]): Probability of each scale in `SCALES` order.
+            num (int): Number of requests per run.
+            num_runs (Optional[int], optional): Number of runs to draw at once. Defaults
+                to None, which returns one-dimensional arrays for a single run.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Scale indices and feature indices of every
+            request, shaped `(num,)` or `(num_runs, num)`.
+        """
+        shape = (num,) if num_runs is None else (num_runs, num)
+        cdf = np.cumsum(np.asarray(weights, dtype=np.float64))
+        cdf /= cdf[-1]
+        scales = np.searchsorted(cdf, rng.random(shape), side="right")
+        np.minimum(scales, len(cdf) - 1, out=scales)
+
+        features = np.zeros(shape, dtype=np.int64)
+        steps = np.broadcast_to(np.arange(num), shape)
+        for scale in range(len(self.kernels)):
+            selected = scales == scale
+            if not selected.any():
+                continue
+            centres, lags = self.hotspots(rng, scale, shape)
+            masses = self.component_masses(centres, lags, scale)[selected]
+            offsets = np.arange(self.max_lag + 1)
+            origin = np.maximum(steps[selected][:, None] - offsets, 0)
+            if num_runs is None:
+                components = centres[origin]
+            else:
+                runs = np.nonzero(selected)[0][:, None]
+                components = centres[runs, origin]
+            features[selected] = self.sample_features(rng, masses, components, scale)
+        return scales, features
+
+
+@lru_cache(maxsize=None)
+def load_stochastic_demand(feature_counts: Tuple[int, ...]) -> StochasticDemand:
+    """Build the stochastic workload of the cached kernels once per process."""
+    return StochasticDemand(load_kernel_matrices(), feature_counts)
@@ -0,0 +1,694 @@
+import concurrent.futures
+from collections import Counter
+from contextlib import contextmanager
+from itertools import count
+from multiprocessing import cpu_count
+from statistics import NormalDist
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from modules.defaults import DEFAULT_BACKEND
+from modules.result_store import ResultStore
+from modules.scenario import ScenarioData, load_scenario_data
+from modules.simulator import BACKENDS, MonteCarloSimulation
+from modules.weight_search import search_weights
+
+# Scenario dataset handed to each process pool worker once by `_init_worker`.
+_WORKER_DATA: Dict[str, Any] = {}
+
+# A task runs `runs` of the (param, weights) cell at `cell`, starting at run `start`.
+Task = Tuple[Tuple[int, int], int, int]
+
+# A job is a task with the simulator settings, sweep entropy and common random
+# numbers flag it runs with.
+Job = Tuple[Dict[str, Any], int, bool, Task]
+
+
+def _init_worker(scenario: ScenarioData) -> None:
+    """Store the scenario dataset in the worker process."""
+    _WORKER_DATA["scenario"] = scenario
+
+
+def _run_task(
+    settings: Dict[str, Any],
+    entropy: int,
+    common_random_numbers: bool,
+    task: Task,
+    scenario: Any = None,
+) -> Tuple[Task, np.ndarray]:
+    """Execute one chunk of runs of a sweep cell.
+
+    Args:
+        settings (Dict[str, Any]): Keyword arguments used to build the simulator.
+        entropy (int): Entropy of the sweep. Run `r` of cell `(p, w)` draws from the
+            seed sequence with spawn key `(p, w, r)`, so results do not depend on how
+            runs are chunked or scheduled.
+        common_random_numbers (bool): Use the spawn key `(r,)` instead, so run `r`
+            replays the same uniforms in every cell, exactly like run `r` of
+            `MonteCarloSimulation.monte_carlo_simulation(seed=entropy)`.
+        task (Task): Cell indices, first run and number of runs.
+        scenario (Any, optional): Scenario dataset. Defaults to the worker's dataset.
+
+    Returns:
+        Tuple[Task, np.ndarray]: The task and the result of each of its runs. When
+        `settings` holds "capacities", the runs are replayed against an LRU cache of
+        each capacity at once and the results are indexed by (capacity, run).
+    """
+    (param_idx, weights_idx), start, runs = task
+    settings = dict(settings)
+    capacities = settings.pop("capacities", None)
+    simulator = MonteCarloSimulation(
+        **settings,
+        scenario=_WORKER_DATA["scenario"] if scenario is None else scenario,
+        backend="serial",
+    )
+    cell = () if common_random_numbers else (param_idx, weights_idx)
+    seeds = [
+        np.random.SeedSequence(entropy, spawn_key=(*cell, run))
+        for run in range(start, start + runs)
+    ]
+    if capacities is not None:
+        return task, simulator.run_seeded_capacity_sweeps(capacities, seeds)
+    return task, simulator.run_seeded_simulations(seeds)
+
+
+@contextmanager
+def open_runner(
+    backend: str, max_workers: Optional[int], scenario: ScenarioData
+) -> Iterator[Callable[[List[Job]], Iterator[Tuple[Task, np.ndarray]]]]:
+    """Open the worker pool of a sweep.
+
+    Args:
+        backend (str): One of 'thread', 'process' or 'serial'.
+        max_workers (Optional[int]): Number of pool workers. Defaults to the number of
+            CPUs.
+        scenario (ScenarioData): Scenario dataset handed to the workers.
+
+    Yields:
+        Callable[[List[Job]], Iterator[Tuple[Task, np.ndarray]]]: Runs a list of jobs
+        on the pool and yields the results of their tasks as they complete. It can be
+        called repeatedly while the pool is open.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid backend. Use one of {BACKENDS}.")
+
+    if backend == "serial":
+        yield lambda jobs: (_run_task(*job, scenario) for job in jobs)
+        return
+
+    if backend == "thread":
+        executor: concurrent.futures.Executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or cpu_count()
+        )
+        extra: Tuple[Any, ...] = (scenario,)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers or cpu_count(),
+            initializer=_init_worker,
+            initargs=(scenario,),
+        )
+        extra = ()
+
+    def run_tasks(jobs: List[Job]) -> Iterator[Tuple[Task, np.ndarray]]:
+        futures = [executor.submit(_run_task, *job, *extra) for job in jobs]
+        return (future.result() for future in concurrent.futures.as_completed(futures))
+
+    with executor:
+        yield run_tasks
+
+
+def cell_settings(
+    task: Task,
+    weights_list: Sequence[Sequence[float]],
+    param_list: Sequence[Any],
+    common: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Return the simulator keyword arguments of the cell a task belongs to."""
+    (param_idx, weights_idx), _, _ = task
+    return {
+        **common,
+        "weights": weights_list[weights_idx],
+        "param": param_list[param_idx],
+    }
+
+
+def build_tasks(
+    param_list: Sequence[Any],
+    num_weights: int,
+    num_runs: int,
+    runs_per_task: int,
+    skip: Optional[Container[Tuple[int, int]]] = None,
+) -> List[Task]:
+    """Flatten the (param, weights, run) grid into chunks of runs.
+
+    Tasks are ordered from the largest cache parameter to the smallest, so the most
+    expensive chunks start first and the cheap ones fill in the gaps at the end.
+
+    Args:
+        param_list (Sequence[Any]): Cache parameters of the sweep.
+        num_weights (int): Number of weight combinations.
+        num_runs (int): Number of runs per cell.
+        runs_per_task (int): Maximum number of runs in one task.
+        skip (Optional[Container[Tuple[int, int]]], optional): `(param, weights)`
+            index pairs of cells that need no tasks. Defaults to None.
+
+    Returns:
+        List[Task]: Tasks in scheduling order.
+    """
+    skip = () if skip is None else skip
+    order = sorted(range(len(param_list)), key=lambda i: param_list[i], reverse=True)
+    return [
+        ((param_idx, weights_idx), start, min(runs_per_task, num_runs - start))
+        for param_idx in order
+        for weights_idx in range(num_weights)
+        if (param_idx, weights_idx) not in skip
+        for start in range(0, num_runs, runs_per_task)
+    ]
+
+
+def run_sweep(
+    num_requests: int,
+    weights_list: Sequence[Sequence[float]],
+    cache_type: str,
+    param_list: Sequence[Any],
+    num_runs: int,
+    prepopulate_cache: bool = False,
+    return_type: str = "requests",
+    backend: str = DEFAULT_BACKEND,
+    engine: str = "python",
+    workload: str = "uniform",
+    max_workers: Optional[int] = None,
+    runs_per_task: Optional[int] = None,
+    seed: Optional[int] = None,
+    common_random_numbers: bool = False,
+    stack_distance: bool = False,
+    scenario: Optional[ScenarioData] = None,
+    completed: Optional[Dict[Tuple[int, int], np.ndarray]] = None,
+    on_cell_complete: Optional[Callable[[int, int, np.ndarray], None]] = None,
+) -> np.ndarray:
+    """Simulate every (param, weights, run) of a grid on one shared pool.
+
+    Args:
+        num_requests (int): Number of requests per run.
+        weights_list (Sequence[Sequence[float]]): Scale weights of each cell.
+        cache_type (str): Cache type passed to `MonteCarloSimulation`.
+        param_list (Sequence[Any]): Cache parameter of each cell.
+        num_runs (int): Number of runs per cell.
+        prepopulate_cache (bool, optional): Prepopulate the caches. Defaults to False.
+        return_type (str, optional): Metric of each run. Defaults to "requests".
+        backend (str, optional): One of 'thread', 'process' or 'serial'. Defaults to
+            `DEFAULT_BACKEND`.
+        engine (str, optional): Simulation engine of the runs, 'python', 'numba' or
+            'batched'. Defaults to 'python'.
+        workload (str, optional): Request workload of the runs, 'uniform' or
+            'stochastic'. Defaults to 'uniform'.
+        max_workers (Optional[int], optional): Number of pool workers. Defaults to the
+            number of CPUs.
+        runs_per_task (Optional[int], optional): Runs per task. Defaults to splitting
+            each cell into about four tasks.
+        seed (Optional[int], optional): Entropy of the sweep. Defaults to None.
+        common_random_numbers (bool, optional): Replay the same request and
+            prepopulation streams for run `r` of every cell. Defaults to False.
+        stack_distance (bool, optional): For LRU caches, replay each run once for
+            every capacity in `param_list` with `replay_lru_capacities` instead of once
+            per capacity. All capacities of a weights cell then share the streams of
+            its first capacity; with `common_random_numbers` the results are identical
+            to the per-capacity replay. Defaults to False.
+        scenario (Optional[ScenarioData], optional): Scenario dataset. Defaults to the
+            dataset loaded once per process.
+        completed (Optional[Dict[Tuple[int, int], np.ndarray]], optional): Results of
+            cells finished by an earlier, interrupted sweep, keyed by `(param,
+            weights)` indices. They are copied into the output and not simulated
+            again. Defaults to None.
+        on_cell_complete (Optional[Callable[[int, int, np.ndarray], None]], optional):
+            Called with the param index, weights index and per-run results as soon as
+            every run of a cell is done, e.g. to checkpoint it. Defaults to None.
+
+    Returns:
+        np.ndarray: Results indexed by (param, weights, run).
+    """
+    scenario = load_scenario_data() if scenario is None else scenario
+    entropy = np.random.SeedSequence(seed).entropy
+    runs_per_task = runs_per_task or max(1, -(-num_runs // 4))
+    completed = {} if completed is None else completed
+    common: Dict[str, Any] = {
+        "num": num_requests,
+        "cache_type": cache_type,
+        "prepopulate_cache": prepopulate_cache,
+        "return_type": return_type,
+        "engine": engine,
+        "workload": workload,
+    }
+    if stack_distance:
+        if cache_type not in ("LRUCache", "ArrayLRUCache"):
+            raise ValueError("Stack distance sweeps need an LRU cache type.")
+        # One task per weights replays its runs for every capacity, stored at param 0
+        common["capacities"] = list(param_list)
+        skip = {
+            (0, weights_idx)
+            for weights_idx in range(len(weights_list))
+            if all((p, weights_idx) in completed for p in range(len(param_list)))
+        }
+        tasks = build_tasks(
+            param_list[:1], len(weights_list), num_runs, runs_per_task, skip=skip
+        )
+    else:
+        tasks = build_tasks(
+            param_list, len(weights_list), num_runs, runs_per_task, skip=completed
+        )
+    results = np.empty((len(param_list), len(weights_list), num_runs))
+    for (param_idx, weights_idx), values in completed.items():
+        results[param_idx, weights_idx] = values
+    # Number of unfinished tasks of each cell.
+    pending = Counter(cell for cell, _, _ in tasks)
+
+    def store(task: Task, values: np.ndarray) -> None:
+        (param_idx, weights_idx), start, runs = task
+        if stack_distance:
+            results[:, weights_idx, start : start + runs] = values
+            cells = [(p, weights_idx) for p in range(len(param_list))]
+        else:
+            results[param_idx, weights_idx, start : start + runs] = values
+            cells = [(param_idx, weights_idx)]
+        pending[param_idx, weights_idx] -= 1
+        if on_cell_complete is not None and not pending[param_idx, weights_idx]:
+            for cell in cells:
+                if cell not in completed:
+                    on_cell_complete(*cell, results[cell])
+
+    jobs = [
+        (
+            cell_settings(task, weights_list, param_list, common),
+            entropy,
+            common_random_numbers,
+            task,
+        )
+        for task in tasks
+    ]
+    with open_runner(backend, max_workers, scenario) as run_tasks:
+        for task, values in run_tasks(jobs):
+            store(task, values)
+    return results
+
+
+def _next_tasks(
+    results: Dict[Tuple[int, int], np.ndarray],
+    active: Container[Tuple[int, int]],
+    order: Sequence[int],
+    num_weights: int,
+    runs: int,
+    max_runs: int,
+) -> List[Task]:
+    """Return the tasks of the next round of `run_sequential_sweep`.
+
+    Every active cell continues from the runs it already has, without exceeding
+    `max_runs`, in the same largest-parameter-first order as `build_tasks`.
+    """
+    tasks = []
+    for param_idx in order:
+        for weights_idx in range(num_weights):
+            cell = (param_idx, weights_idx)
+            if cell in active:
+                start = len(results.get(cell, ()))
+                tasks.append((cell, start, min(runs, max_runs - start)))
+    return tasks
+
+
+def _half_width(values: np.ndarray, z: float) -> float:
+    """Return the half width of the confidence interval of the mean of `values`.
+
+    A single run has no sample deviation, so its interval is unbounded.
+    """
+    if len(values) < 2:
+        return np.inf
+    return z * values.std(ddof=1) / np.sqrt(len(values))
+
+
+def _stopped_cells(
+    results: Dict[Tuple[int, int], np.ndarray],
+    active: Container[Tuple[int, int]],
+    order: Sequence[int],
+    num_weights: int,
+    max_runs: int,
+    ci_width: float,
+    z: float,
+) -> List[Tuple[int, int]]:
+    """Return the active cells the stopping rule of `run_sequential_sweep` ends.
+
+    Args:
+        results (Dict[Tuple[int, int], np.ndarray]): Runs of every started cell.
+        active (Container[Tuple[int, int]]): Cells that still get runs.
+        order (Sequence[int]): Parameter indices in scheduling order.
+        num_weights (int): Number of weight combinations.
+        max_runs (int): Maximum number of runs per cell.
+        ci_width (float): Target width of the confidence interval of a cell mean.
+        z (float): Normal quantile of the confidence level.
+
+    Returns:
+        List[Tuple[int, int]]: Cells to stop, in scheduling order.
+    """
+    stopped = []
+    for param_idx in order:
+        cells = [
+            (param_idx, weights_idx)
+            for weights_idx in range(num_weights)
+            if (param_idx, weights_idx) in results
+        ]
+        if not cells:
+            continue
+        means = {cell: results[cell].mean() for cell in cells}
+        widths = {cell: _half_width(results[cell], z) for cell in cells}
+        best = max(cells, key=means.__getitem__)
+        best_lower = means[best] - widths[best]
+        stopped.extend(
+            cell
+            for cell in cells
+            if cell in active
+            and (
+                len(results[cell]) >= max_runs
+                or 2 * widths[cell] <= ci_width
+                or means[cell] + widths[cell] < best_lower
+            )
+        )
+    return stopped
+
+
+def run_sequential_sweep(
+    num_requests: int,
+    weights_list: Sequence[Sequence[float]],
+    cache_type: str,
+    param_list: Sequence[Any],
+    max_runs: int,
+    min_runs: int,
+    batch_runs: int,
+    ci_width: float,
+    confidence: float = 0.95,
+    prepopulate_cache: bool = False,
+    return_type: str = "requests",
+    backend: str = DEFAULT_BACKEND,
+    engine: str = "python",
+    workload: str = "uniform",
+    max_workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    common_random_numbers: bool = False,
+    scenario: Optional[ScenarioData] = None,
+    completed: Optional[Dict[Tuple[int, int], np.ndarray]] = None,
+    on_cell_complete: Optional[Callable[[int, int, np.ndarray], None]] = None,
+) -> Dict[Tuple[int, int], np.ndarray]:
+    """Simulate a grid, adding runs to each cell only while they are informative.
+
+    Every cell starts with `min_runs` runs. After each round a cell stops once the
+    confidence interval of its mean is narrower than `ci_width`, once it reaches
+    `max_runs`, or once its upper bound falls below the lower bound of the best cell
+    of the same parameter, since it can then no longer be the optimum picked by
+    `calculate_results`. The remaining cells get `batch_runs` more runs on the same
+    pool. Run `r` of a cell uses the same seed as in `run_sweep`, so a cell that
+    reaches `max_runs` gets exactly the results of a fixed-size sweep.
+
+    Args:
+        num_requests (int): Number of requests per run.
+        weights_list (Sequence[Sequence[float]]): Scale weights of each cell.
+        cache_type (str): Cache type passed to `MonteCarloSimulation`.
+        param_list (Sequence[Any]): Cache parameter of each cell.
+        max_runs (int): Maximum number of runs per cell.
+        min_runs (int): Number of runs of the first round, at least 2.
+        batch_runs (int): Number of runs added to an unfinished cell each round.
+        ci_width (float): Target width of the confidence interval of a cell mean.
+        confidence (float, optional): Confidence level of the intervals. Defaults to
+            0.95.
+        prepopulate_cache (bool, optional): Prepopulate the caches. Defaults to False.
+        return_type (str, optional): Metric of each run. Defaults to "requests".
+        backend (str, optional): One of 'thread', 'process' or 'serial'. Defaults to
+            `DEFAULT_BACKEND`.
+        engine (str, optional): Simulation engine of the runs, 'python', 'numba' or
+            'batched'. Defaults to 'python'.
+        workload (str, optional): Request workload of the runs, 'uniform' or
+            'stochastic'. Defaults to 'uniform'.
+        max_workers (Optional[int], optional): Number of pool workers. Defaults to the
+            number of CPUs.
+        seed (Optional[int], optional): Entropy of the sweep. Defaults to None.
+        common_random_numbers (bool, optional): Replay the same request and
+            prepopulation streams for run `r` of every cell. Defaults to False.
+        scenario (Optional[ScenarioData], optional): Scenario dataset. Defaults to the
+            dataset loaded once per process.
+        completed (Optional[Dict[Tuple[int, int], np.ndarray]], optional): Results of
+            cells stopped by an earlier, interrupted sweep, keyed by `(param,
+            weights)` indices. Defaults to None.
+        on_cell_complete (Optional[Callable[[int, int, np.ndarray], None]], optional):
+            Called with the param index, weights index and per-run results when a cell
+            stops. Defaults to None.
+
+    Returns:
+        Dict[Tuple[int, int], np.ndarray]: Results of each `(param, weights)` cell,
+        with as many runs as the cell needed.
+
+    Raises:
+        ValueError: If `batch_runs` is below 1 or `min_runs` exceeds `max_runs`.
+    """
+    if batch_runs < 1:
+        raise ValueError("batch_runs must be at least 1.")
+    if min_runs > max_runs:
+        raise ValueError("min_runs can't exceed the number of runs.")
+    scenario = load_scenario_data() if scenario is None else scenario
+    entropy = np.random.SeedSequence(seed).entropy
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    common = {
+        "num": num_requests,
+        "cache_type": cache_type,
+        "prepopulate_cache": prepopulate_cache,
+        "return_type": return_type,
+        "engine": engine,
+        "workload": workload,
+    }
+    results: Dict[Tuple[int, int], np.ndarray] = dict(completed or {})
+    active = {
+        (param_idx, weights_idx)
+        for param_idx in range(len(param_list))
+        for weights_idx in range(len(weights_list))
+    } - set(results)
+    order = sorted(range(len(param_list)), key=lambda i: param_list[i], reverse=True)
+    runs = max(min_runs, 2)
+
+    with open_runner(backend, max_workers, scenario) as run_tasks:
+        while active:
+            tasks = _next_tasks(
+                results, active, order, len(weights_list), runs, max_runs
+            )
+            jobs = [
+                (
+                    cell_settings(task, weights_list, param_list, common),
+                    entropy,
+                    common_random_numbers,
+                    task,
+                )
+                for task in tasks
+            ]
+            for task, values in run_tasks(jobs):
+                cell = task[0]
+                results[cell] = np.concatenate([results.get(cell, []), values])
+            runs = batch_runs
+
+            for cell in _stopped_cells(
+                results, active, order, len(weights_list), max_runs, ci_width, z
+            ):
+                active.remove(cell)
+                if on_cell_complete is not None:
+                    on_cell_complete(*cell, results[cell])
+    return results
+
+
+def stored_sweep_settings(
+    num_requests: int,
+    cache_type: str,
+    num_runs: int,
+    prepopulate_cache: bool,
+    return_type: str,
+    workload: str = "uniform",
+    replicates: Optional[Dict[str, Any]] = None,
+    streams: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Return the settings that identify the cells of a sweep in a `ResultStore`.
+
+    Settings left at their defaults are omitted, so stores written before a setting
+    existed keep resuming.
+
+    Args:
+        num_requests (int): Number of requests per run.
+        cache_type (str): Cache type of the sweep.
+        num_runs (int): Number of runs per cell, the maximum of a sequential sweep.
+        prepopulate_cache (bool): Prepopulate the caches.
+        return_type (str): Metric of each run.
+        workload (str, optional): Request workload of the runs. Defaults to "uniform".
+        replicates (Optional[Dict[str, Any]], optional): `ci_width`, `min_runs` and
+            `batch_runs` of a sequential sweep. Defaults to None.
+        streams (Optional[Dict[str, Any]], optional): `seed`, `common_random_numbers`
+            and `stack_distance` of the run streams. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: JSON-serializable description of the sweep.
+    """
+    streams = streams or {}
+    sweep: Dict[str, Any] = {
+        "num_requests": num_requests,
+        "cache_type": cache_type,
+        "num_runs": num_runs,
+        "prepopulate_cache": prepopulate_cache,
+        "return_type": return_type,
+    }
+    if replicates is not None and replicates["ci_width"] > 0:
+        sweep.update(replicates)
+    if streams.get("seed") is not None or streams.get("common_random_numbers"):
+        sweep.update(
+            seed=streams.get("seed"),
+            common_random_numbers=streams.get("common_random_numbers", False),
+        )
+    if streams.get("stack_distance"):
+        sweep["stack_distance"] = True
+    if workload != "uniform":
+        sweep["workload"] = workload
+    return sweep
+
+
+def make_evaluator(
+    store: ResultStore,
+    settings: Dict[str, Any],
+    num_runs: int,
+    replicates: Optional[Dict[str, Any]] = None,
+    streams: Optional[Dict[str, Any]] = None,
+) -> Callable[..., Any]:
+    """Return a function that simulates a grid of cells and checkpoints each of them.
+
+    Args:
+        store (ResultStore): Checkpoints of the sweep. Cells it already holds are
+            not simulated again, and every finished cell is appended to it.
+        settings (Dict[str, Any]): Keyword arguments shared by `run_sweep` and
+            `run_sequential_sweep`, such as the request count, cache type, backend,
+            engine and workload.
+        num_runs (int): Number of runs per cell, the maximum of a sequential sweep.
+        replicates (Optional[Dict[str, Any]], optional): `ci_width`, `min_runs` and
+            `batch_runs`. A positive `ci_width` runs `run_sequential_sweep`. Defaults
+            to None.
+        streams (Optional[Dict[str, Any]], optional): `seed`, `common_random_numbers`
+            and `stack_distance` of the run streams. Defaults to None.
+
+    Returns:
+        Callable[..., Any]: `evaluate(params, weights, key=None)` returns the runs of
+        every cell indexed by `[param, weights]`. A `key` gives the grid its own
+        streams, e.g. one per search round, unless common random numbers replay the
+        same streams on purpose.
+    """
+    streams = streams or {}
+    sequential = replicates is not None and replicates["ci_width"] > 0
+    common_random_numbers = streams.get("common_random_numbers", False)
+    entropy = store.entropy(streams.get("seed"))
+    # Cells of a sequential sweep are stored once they stop, whatever their run count
+    min_stored_runs = replicates["min_runs"] if sequential else num_runs
+
+    def evaluate(
+        params: Sequence[Any],
+        weights: Sequence[Sequence[float]],
+        key: Optional[Tuple[int, ...]] = None,
+    ) -> Any:
+        stored = store.load()
+        done = store.completed_cells(min_stored_runs)
+        completed = {
+            (idx, ijx): stored[(param, tuple(w))]
+            for idx, param in enumerate(params)
+            for ijx, w in enumerate(weights)
+            if (param, tuple(w)) in done
+        }
+        seed = entropy
+        if key is not None and not common_random_numbers:
+            seed = int(
+                np.random.SeedSequence(entropy, spawn_key=key).generate_state(1)[0]
+            )
+
+        def checkpoint(idx: int, ijx: int, values: np.ndarray) -> None:
+            store.append_cell(params[idx], weights[ijx], values)
+
+        grid = {
+            **settings,
+            "weights_list": weights,
+            "param_list": params,
+            "seed": seed,
+            "common_random_numbers": common_random_numbers,
+            "completed": completed,
+            "on_cell_complete": checkpoint,
+        }
+        if sequential:
+            return run_sequential_sweep(**grid, max_runs=num_runs, **replicates)
+        return run_sweep(
+            **grid,
+            num_runs=num_runs,
+            stack_distance=streams.get("stack_distance", False),
+        )
+
+    return evaluate
+
+
+def search_cells(
+    evaluate: Callable[..., Any],
+    param_list: Sequence[Any],
+    weights_list: Sequence[Sequence[float]],
+    num_runs: int,
+    search_mode: str = "grid",
+    simulation_budget: int = 2000,
+    step_size: float = 0.1,
+) -> List[Dict[Tuple[float, ...], float]]:
+    """Return the mean result of the evaluated weights of every parameter.
+
+    Args:
+        evaluate (Callable[..., Any]): Grid evaluator returned by `make_evaluator`.
+        param_list (Sequence[Any]): Cache parameters of the sweep.
+        weights_list (Sequence[Sequence[float]]): Weights of the 'grid' search.
+        num_runs (int): Number of runs per cell.
+        search_mode (str, optional): 'grid' evaluates every weights of `weights_list`
+            in one sweep, 'adaptive' runs `search_weights` for each parameter.
+            Defaults to "grid".
+        simulation_budget (int, optional): Runs of each adaptive search. Defaults to
+            2000.
+        step_size (float, optional): Weight resolution of the adaptive search.
+            Defaults to 0.1.
+
+    Returns:
+        List[Dict[Tuple[float, ...], float]]: For each parameter, the mean result of
+        every evaluated weights.
+    """
+    if search_mode == "grid":
+        results = evaluate(param_list, weights_list)
+        return [
+            {
+                tuple(weights): results[idx, ijx].mean()
+                for ijx, weights in enumerate(weights_list)
+            }
+            for idx in range(len(param_list))
+        ]
+
+    weight_results_list = []
+    for idx, param in enumerate(param_list):
+        # Each search round draws its own streams, keyed by constraint and round
+        rounds = count()
+
+        def evaluate_weights(weights, idx=idx, param=param, rounds=rounds):
+            results = evaluate([param], weights, key=(idx, next(rounds)))
+            return [results[0, ijx] for ijx in range(len(weights))]
+
+        weight_results_list.append(
+            search_weights(
+                evaluate_weights,
+                step_size=step_size,
+                simulation_budget=simulation_budget,
+                num_runs=num_runs,
+            )
+        )
+    return weight_results_list
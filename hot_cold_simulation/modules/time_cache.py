@@ -1,11 +1,22 @@
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from typing import Any, List
 
 
 class TimeCache:
+    """Cache whose entries expire a fixed number of `put` calls after their last put.
+
+    Every `put` advances a global epoch counter. An entry put at epoch `e` is given the
+    expiry epoch `e + max(expiration_time, 1)` and is filed in the bucket of that
+    epoch, so a `put` only touches the bucket of the epoch it opens instead of walking
+    the whole cache. Buckets may hold stale keys that were put again later; these are
+    skipped because their stored expiry no longer matches the bucket.
+    """
+
     def __init__(self, expiration_time):
         self.cache = OrderedDict()
         self.expiration_time = expiration_time
+        self.epoch = 0
+        self.buckets = defaultdict(list)
 
     def get(self, key: int) -> int:
         if key not in self.cache:
@@ -14,21 +25,19 @@ class TimeCache:
             return self.cache[key][0]
 
     def put(self, keys: List[int]) -> None:
-        # Update the counter of existing items
-        keys_to_delete = []
-        for k, (value, count) in self.cache.items():
-            if count <= 1:
-                keys_to_delete.append(k)
-            else:
-                self.cache[k] = (value, count - 1)
+        self.epoch += 1
 
         # Remove items whose counter has reached zero
-        for k in keys_to_delete:
-            del self.cache[k]
+        for k in self.buckets.pop(self.epoch, ()):
+            entry = self.cache.get(k)
+            if entry is not None and entry[1] == self.epoch:
+                del self.cache[k]
 
-        # Put the new items in the cache with a counter of expiration_time
+        # Put the new items in the cache with an expiry expiration_time epochs ahead
+        expiry = self.epoch + max(self.expiration_time, 1)
         for key in keys:
-            self.cache[key] = (key, self.expiration_time)
+            self.cache[key] = (key, expiry)
+        self.buckets[expiry].extend(keys)
 
     def current_state(self) -> list[Any]:
         return list(self.cache.keys())
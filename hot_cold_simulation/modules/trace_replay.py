@@ -0,0 +1,175 @@
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd  # type: ignore
+from modules.scenario import ScenarioData, load_scenario_data
+from modules.scene_costs import CostLedger, SceneCosts
+from modules.simulator import MonteCarloSimulation
+from modules.workload import SCALES, run_streams
+
+# Scale names accepted in a trace, mapped to their index in `SCALES`.
+SCALE_NAMES = {"regions": 0, "divisions": 0, "states": 1, "counties": 2}
+
+
+def to_scale_indices(values: Any) -> np.ndarray:
+    """Convert a column of scale names or indices into indices into `SCALES`."""
+    series = pd.Series(values)
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.str.lower().map(SCALE_NAMES)
+        if series.isna().any():
+            raise ValueError(f"Unknown scale in trace. Use one of {list(SCALE_NAMES)}.")
+    return series.to_numpy(dtype=np.int64)
+
+
+def read_trace(
+    path: Path,
+    chunk_size: int = 1_000_000,
+    scale_column: str = "scale",
+    feature_column: str = "feature",
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Stream a request log in chunks without loading it whole.
+
+    CSV files are read with `pandas.read_csv(chunksize=...)`, Parquet files with
+    `pyarrow.parquet.ParquetFile.iter_batches`, which needs pyarrow installed.
+
+    Args:
+        path (Path): CSV or Parquet file with one request per row.
+        chunk_size (int, optional): Rows per chunk. Defaults to 1_000_000.
+        scale_column (str, optional): Column with the scale name ("regions", "states",
+            "counties") or index of each request. Defaults to "scale".
+        feature_column (str, optional): Column with the feature index of each
+            request. Defaults to "feature".
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: Scale and feature indices of a chunk.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq  # type: ignore
+
+        batches = (
+            batch.to_pandas()
+            for batch in pq.ParquetFile(path).iter_batches(
+                batch_size=chunk_size, columns=[scale_column, feature_column]
+            )
+        )
+    else:
+        batches = pd.read_csv(
+            path, usecols=[scale_column, feature_column], chunksize=chunk_size
+        )
+
+    for batch in batches:
+        yield (
+            to_scale_indices(batch[scale_column]),
+            batch[feature_column].to_numpy(dtype=np.int64),
+        )
+
+
+def read_whole_trace(
+    chunks: Iterator[Tuple[np.ndarray, np.ndarray]]
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Join the chunks of `read_trace` into a single chunk of the whole trace."""
+    parts = list(chunks)
+    if parts:
+        scales, features = zip(*parts)
+        yield np.concatenate(scales), np.concatenate(features)
+
+
+def replay_trace(
+    path: Path,
+    cache_type: str,
+    param: Any,
+    prepopulate_cache: bool = False,
+    chunk_size: int = 1_000_000,
+    scale_column: str = "scale",
+    feature_column: str = "feature",
+    seed: Optional[int] = None,
+    scenario: Optional[ScenarioData] = None,
+    logger: Optional[logging.Logger] = None,
+    costs: Optional[SceneCosts] = None,
+) -> Dict[str, float]:
+    """Replay a real request log through one cache, chunk by chunk.
+
+    The cache carries its state from one chunk to the next, so the metrics are the
+    ones `run_simulation` would report for the whole trace, while memory only holds
+    one chunk at a time. Offline policies such as `BeladyCache` plan every put over
+    all later requests, so their trace is read whole and replayed as one chunk, which
+    needs the whole trace in memory.
+
+    Args:
+        path (Path): CSV or Parquet file with one request per row.
+        cache_type (str): Cache type, as in `MonteCarloSimulation`.
+        param (Any): Cache parameter.
+        prepopulate_cache (bool, optional): Prepopulate the cache. Defaults to False.
+        chunk_size (int, optional): Rows per chunk. Defaults to 1_000_000.
+        scale_column (str, optional): Column of the request scales. Defaults to
+            "scale".
+        feature_column (str, optional): Column of the request features. Defaults to
+            "feature".
+        seed (Optional[int], optional): Entropy of the prepopulation. Defaults to None.
+        scenario (Optional[ScenarioData], optional): Scenario dataset. Defaults to the
+            dataset loaded once per process.
+        logger (Optional[logging.Logger], optional): Logger of the progress and
+            throughput after every chunk. Defaults to no progress output.
+        costs (Optional[SceneCosts], optional): Scene sizes and cold retrieval costs
+            and latencies. When given, the totals of `CostLedger.totals` are added to
+            the metrics. Defaults to None.
+
+    Returns:
+        Dict[str, float]: Number of requests, free requests ("requests"), free scenes
+        ("scenes"), total scenes and free scene ratio ("ratio") of the trace.
+    """
+    simulator = MonteCarloSimulation(
+        weights=[],
+        num=0,
+        cache_type=cache_type,
+        param=param,
+        prepopulate_cache=prepopulate_cache,
+        backend="serial",
+        scenario=load_scenario_data() if scenario is None else scenario,
+    )
+    prepopulate_rng, _ = run_streams(np.random.SeedSequence(seed))
+    cache = simulator.create_cache(prepopulate_rng)
+    feature_counts = np.asarray(simulator.scenario.feature_counts)
+    ledger = CostLedger(costs) if costs is not None else None
+
+    chunks = read_trace(path, chunk_size, scale_column, feature_column)
+    if hasattr(cache, "plan"):
+        chunks = read_whole_trace(chunks)
+
+    totals = np.zeros(4, dtype=np.int64)
+    start_time = time.time()
+    for scales, features in chunks:
+        invalid = (scales < 0) | (scales >= len(SCALES))
+        invalid[~invalid] |= (features[~invalid] < 0) | (
+            features[~invalid] >= feature_counts[scales[~invalid]]
+        )
+        if invalid.any():
+            row = int(totals[0] + np.argmax(invalid))
+            raise ValueError(f"Request {row} of the trace is out of range.")
+
+        totals[0] += len(scales)
+        totals[1:] += simulator.replay_requests(cache, scales, features, ledger=ledger)
+        if logger is not None:
+            elapsed = time.time() - start_time
+            logger.info(
+                f"Replayed {totals[0]:,} requests in {elapsed:.1f} s "
+                f"({totals[0] / max(elapsed, 1e-9):,.0f} requests/s), "
+                f"free requests {totals[1]:,}, "
+                f"free scene ratio {totals[2] / max(totals[3], 1):.4f}"
+            )
+
+    requests, free_requests, free_scenes, total_scenes = totals.tolist()
+    metrics = {
+        "num_requests": requests,
+        "requests": free_requests,
+        "scenes": free_scenes,
+        "total_scenes": total_scenes,
+        "ratio": free_scenes / total_scenes if total_scenes > 0 else 0,
+    }
+    if ledger is not None:
+        metrics.update(ledger.totals())
+    return metrics
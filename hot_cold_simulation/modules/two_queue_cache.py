@@ -0,0 +1,93 @@
+import random
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+import numpy as np
+from modules.array_lru_cache import NUM_SCENES
+
+# Share of the capacity given to the FIFO of scenes seen once (`Kin` of 2Q).
+IN_SHARE = 0.25
+
+# Size of the ghost FIFO of scenes evicted from `a1in`, relative to the capacity
+# (`Kout` of 2Q).
+OUT_SHARE = 0.5
+
+
+class TwoQueueCache:
+    """Full 2Q cache (Johnson and Shasha) over scene IDs.
+
+    A new scene enters the FIFO `a1in`. When `a1in` outgrows its share of the cache
+    its oldest scene is evicted and remembered in the ghost FIFO `a1out`, and a scene
+    referenced again while in `a1out` is promoted to the LRU queue `am`. Scenes seen
+    only once, such as the footprint of a one-off region request, therefore can't
+    flush `am`. Every operation is O(1).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        prepopulate=False,
+        rng: Optional[np.random.Generator] = None,
+        num_scenes: int = NUM_SCENES,
+    ):
+        self.capacity = capacity
+        self.rng = rng
+        self.num_scenes = num_scenes
+        self.in_size = max(int(capacity * IN_SHARE), 1)
+        self.out_size = max(int(capacity * OUT_SHARE), 1)
+        self.a1in: "OrderedDict[int, None]" = OrderedDict()
+        self.a1out: "OrderedDict[int, None]" = OrderedDict()
+        self.am: "OrderedDict[int, None]" = OrderedDict()
+        if prepopulate:
+            self.prepopulate_cache()
+
+    def get(self, key: int) -> int:
+        if key in self.am or key in self.a1in:
+            return key
+        else:
+            return -1
+
+    def put(self, keys: List[int]) -> None:
+        for key in keys:
+            self.reference(key)
+
+    def reference(self, key: int) -> None:
+        """Apply one reference to `key`."""
+        if self.capacity <= 0:
+            return
+        if key in self.am:
+            self.am.move_to_end(key)
+        elif key in self.a1in:
+            # 2Q leaves scenes in `a1in` in place, correlated references don't count
+            return
+        elif key in self.a1out:
+            del self.a1out[key]
+            self.reclaim()
+            self.am[key] = None
+        else:
+            self.reclaim()
+            self.a1in[key] = None
+
+    def reclaim(self) -> None:
+        """Free one slot when the cache is full."""
+        if len(self.a1in) + len(self.am) < self.capacity:
+            return
+        if len(self.a1in) > self.in_size or not self.am:
+            key, _ = self.a1in.popitem(last=False)
+            self.a1out[key] = None
+            if len(self.a1out) > self.out_size:
+                self.a1out.popitem(last=False)
+        else:
+            self.am.popitem(last=False)
+
+    def prepopulate_cache(self) -> None:
+        # The scenes of `LRUCache.prepopulate_cache`, in the LRU queue
+        if self.rng is not None:
+            keys = self.rng.permutation(self.num_scenes)[: self.capacity][::-1].tolist()
+        else:
+            keys = random.sample(range(self.num_scenes), self.capacity)
+        for key in keys:
+            self.am[key] = None
+
+    def current_state(self) -> list[Any]:
+        return list(self.a1in.keys()) + list(self.am.keys())
@@ -0,0 +1,109 @@
+from itertools import permutations
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# A point of the weight simplex as integer (region, state, county) lattice counts.
+Point = Tuple[int, int, int]
+
+
+def to_weights(point: Point, divisions: int) -> Tuple[float, ...]:
+    """Convert lattice counts into (region, state, county) weights."""
+    return tuple(round(count / divisions, 4) for count in point)
+
+
+def simplex_grid(divisions: int, coarse: int) -> List[Point]:
+    """Return a coarse grid of the simplex on the lattice with `divisions` steps.
+
+    Args:
+        divisions (int): Number of steps of the final lattice, i.e. `1 / step_size`.
+        coarse (int): Number of steps of the coarse grid.
+
+    Returns:
+        List[Point]: Grid points snapped onto the final lattice.
+    """
+    points = []
+    for i in range(coarse + 1):
+        for j in range(coarse + 1 - i):
+            region = round(i * divisions / coarse)
+            state = round(j * divisions / coarse)
+            points.append((region, state, divisions - region - state))
+    return list(dict.fromkeys(points))
+
+
+def neighbours(point: Point, spacing: int) -> List[Point]:
+    """Return the points `spacing` lattice steps away, moving weight between scales."""
+    result = []
+    for src, dst in permutations(range(3), 2):
+        if point[src] >= spacing:
+            moved = list(point)
+            moved[src] -= spacing
+            moved[dst] += spacing
+            result.append(tuple(moved))
+    return result  # type: ignore
+
+
+def search_weights(
+    evaluate: Callable[[List[Tuple[float, ...]]], Sequence[np.ndarray]],
+    step_size: float,
+    simulation_budget: int,
+    num_runs: int,
+    coarse: int = 4,
+    top_k: int = 3,
+) -> Dict[Tuple[float, ...], float]:
+    """Search the weight simplex for the weights with the highest mean result.
+
+    Starts from a coarse grid, then repeatedly evaluates the unvisited neighbours of
+    the `top_k` best points. Once every neighbour of the best points has been visited
+    the neighbourhood spacing is halved, down to one `step_size`. Only a small part of
+    the `linear_combinations(step_size)` grid ends up being simulated.
+
+    Args:
+        evaluate (Callable[[List[Tuple[float, ...]]], Sequence[np.ndarray]]):
+            Simulates each of the given weights up to `num_runs` times and returns the
+            results of the runs of each weights.
+        step_size (float): Resolution of the weights, as in `linear_combinations`.
+        simulation_budget (int): Maximum number of simulation runs. A round is only
+            started if every candidate it evaluates could use all `num_runs`.
+        num_runs (int): Maximum number of runs per evaluated weights.
+        coarse (int, optional): Number of steps of the initial grid. Defaults to 4.
+        top_k (int, optional): Number of best points refined each round. Defaults to 3.
+
+    Returns:
+        Dict[Tuple[float, ...], float]: Mean result of every evaluated weights, in the
+        format expected by `calculate_results`.
+
+    Raises:
+        ValueError: If the budget can't afford the `num_runs` runs of one candidate.
+    """
+    if simulation_budget < num_runs:
+        raise ValueError(
+            f"The simulation budget ({simulation_budget}) is below the {num_runs} runs"
+            " of one candidate weights."
+        )
+    divisions = round(1 / step_size)
+    spacing = max(1, divisions // coarse)
+    scores: Dict[Point, float] = {}
+    spent = 0
+    candidates = simplex_grid(divisions, min(coarse, divisions))
+
+    def unvisited(best: Sequence[Point]) -> List[Point]:
+        points = (p for parent in best for p in neighbours(parent, spacing))
+        return [p for p in dict.fromkeys(points) if p not in scores]
+
+    while candidates:
+        affordable = (simulation_budget - spent) // num_runs
+        if affordable <= 0:
+            break
+        batch = candidates[:affordable]
+        values = evaluate([to_weights(point, divisions) for point in batch])
+        scores.update(zip(batch, (float(np.mean(runs)) for runs in values)))
+        spent += sum(len(runs) for runs in values)
+
+        best = sorted(scores, key=scores.__getitem__, reverse=True)[:top_k]
+        candidates = unvisited(best)
+        while not candidates and spacing > 1:
+            spacing //= 2
+            candidates = unvisited(best)
+
+    return {to_weights(point, divisions): score for point, score in scores.items()}
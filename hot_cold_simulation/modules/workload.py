@@ -0,0 +1,116 @@
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+SCALES = ("regions", "states", "counties")
+
+
+def run_streams(
+    seed: np.random.SeedSequence,
+) -> Tuple[np.random.Generator, np.random.Generator]:
+    """Derive the independent prepopulation and workload generators of a run.
+
+    Keeping the request stream apart from the prepopulation draws means a run replays
+    the same requests whatever the cache capacity, and the prepopulated scenes are the
+    same whatever the weights, which gives common random numbers across cells.
+
+    Args:
+        seed (np.random.SeedSequence): Seed sequence of the run.
+
+    Returns:
+        Tuple[np.random.Generator, np.random.Generator]: Generators used to prepopulate
+        the cache and to draw the requests.
+    """
+    prepopulate, workload = (
+        np.random.default_rng(
+            np.random.SeedSequence(seed.entropy, spawn_key=(*seed.spawn_key, stream))
+        )
+        for stream in range(2)
+    )
+    return prepopulate, workload
+
+
+def generate_requests(
+    rng: np.random.Generator,
+    weights: Sequence[float],
+    feature_counts: Sequence[int],
+    num: int,
+    num_runs: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Draw a whole stream of (scale, feature) requests in one batched call.
+
+    Both draws use the inverse-CDF method on a single block of uniforms, so the scale
+    of a request is the first bin of the cumulative weights that exceeds its uniform
+    and the feature is picked uniformly among the features of that scale.
+
+    Args:
+        rng (np.random.Generator): Generator the uniforms are drawn from.
+        weights (Sequence[float]): Probability of each scale in `SCALES` order.
+        feature_counts (Sequence[int]): Number of features available at each scale.
+        num (int): Number of requests per run.
+        num_runs (Optional[int], optional): Number of runs to draw at once. Defaults to
+            None, which returns one-dimensional arrays for a single run.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Scale indices and feature indices of every
+        request, shaped `(num,)` or `(num_runs, num)`.
+    """
+    shape = (num,) if num_runs is None else (num_runs, num)
+    uniforms = rng.random((2, *shape))
+
+    cdf = np.cumsum(np.asarray(weights, dtype=np.float64))
+    cdf /= cdf[-1]
+    scales = np.searchsorted(cdf, uniforms[0], side="right")
+    np.minimum(scales, len(cdf) - 1, out=scales)
+
+    counts = np.asarray(feature_counts, dtype=np.int64)[scales]
+    features = np.minimum((uniforms[1] * counts).astype(np.int64), counts - 1)
+    return scales, features
+
+
+def draw_seeded_runs(
+    seeds: Sequence[np.random.SeedSequence],
+    weights: Sequence[float],
+    feature_counts: Sequence[int],
+    num: int,
+    prepopulate_size: int = 0,
+    num_scenes: int = 886,
+    draw_requests: Optional[
+        Callable[[np.random.Generator], Tuple[np.ndarray, np.ndarray]]
+    ] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Draw the requests and prepopulated scenes of a batch of seeded runs.
+
+    Each run draws from its own `run_streams`, exactly like `run_seeded_simulation`,
+    so a batch engine replays the same runs as the per-run Python loop.
+
+    Args:
+        seeds (Sequence[np.random.SeedSequence]): Seed sequence of each run.
+        weights (Sequence[float]): Probability of each scale in `SCALES` order.
+        feature_counts (Sequence[int]): Number of features available at each scale.
+        num (int): Number of requests per run.
+        prepopulate_size (int, optional): Number of prepopulated scenes. Defaults to 0.
+        num_scenes (int, optional): Number of scenes. Defaults to 886.
+        draw_requests (Optional[Callable], optional): Draws the requests of a run from
+            its workload generator. Defaults to `generate_requests`.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Scale and feature indices shaped
+        `(runs, num)`, and the prepopulated scenes of each run, least recent first,
+        shaped `(runs, prepopulate_size)`.
+    """
+    scales = np.empty((len(seeds), num), dtype=np.int64)
+    features = np.empty((len(seeds), num), dtype=np.int64)
+    orders = np.empty((len(seeds), prepopulate_size), dtype=np.int64)
+    for run, seed in enumerate(seeds):
+        prepopulate_rng, workload_rng = run_streams(seed)
+        if prepopulate_size:
+            permutation = prepopulate_rng.permutation(num_scenes)
+            orders[run] = permutation[:prepopulate_size][::-1]
+        if draw_requests is None:
+            scales[run], features[run] = generate_requests(
+                workload_rng, weights, feature_counts, num
+            )
+        else:
+            scales[run], features[run] = draw_requests(workload_rng)
+    return scales, features, orders
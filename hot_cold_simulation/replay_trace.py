@@ -0,0 +1,118 @@
+import argparse
+import textwrap
+import time
+
+from modules.config import MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.logger_config import setup_logger  # type: ignore
+from modules.scene_costs import SceneCosts  # type: ignore
+from modules.trace_replay import replay_trace  # type: ignore
+
+logger = setup_logger(MONTE_CARLO_LOG_DIR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="replay-trace",
+        add_help=True,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(
+            """\
+    Description: Replay a real request log through a cache instead of a synthetic workload.
+
+    The log is a CSV or Parquet file with one request per row: the scale ("regions",
+    "states", "counties" or its index 0-2) and the feature index of the request. It is
+    read in chunks, so logs larger than memory can be replayed. Offline policies such
+    as BeladyCache plan over the whole log, so it is read into memory for them.
+
+    With --costs or --cost-table, the cold reads, bytes moved to the hot layer,
+    promotions, request latency and dollar cost are reported as well. The table of
+    --cost-table is a CSV with a "scene" column, or "path" and "row" columns, and
+    optional "size_bytes", "retrieval_cost" and "retrieval_latency" columns.
+    """
+        ),
+    )
+    parser.add_argument("path", type=str, help="CSV or Parquet request log")
+    parser.add_argument(
+        "--cache-type",
+        type=str,
+        default="LRUCache",
+        help="Cache type registered in modules.cache_registry, e.g. LRUCache, "
+        "ARCCache or BeladyCache (which reads the whole log into memory)",
+    )
+    parser.add_argument(
+        "--param", type=int, required=True, help="Cache capacity or expiration time"
+    )
+    parser.add_argument(
+        "--prepopulate", action="store_true", help="Prepopulate the cache"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1_000_000, help="Requests read per chunk"
+    )
+    parser.add_argument("--scale-column", type=str, default="scale")
+    parser.add_argument("--feature-column", type=str, default="feature")
+    parser.add_argument(
+        "--seed", type=int, default=None, help="Seed of the cache prepopulation"
+    )
+    parser.add_argument(
+        "--cost-table",
+        type=str,
+        default=None,
+        help="CSV of per-scene sizes, retrieval costs and latencies",
+    )
+    parser.add_argument(
+        "--costs",
+        action="store_true",
+        help="Report costs with the default scene sizes, prices and latencies",
+    )
+
+    args = parser.parse_args()
+
+    costs = None
+    if args.cost_table is not None:
+        costs = SceneCosts.from_table(args.cost_table)
+    elif args.costs:
+        costs = SceneCosts.uniform()
+
+    init_time = time.time()
+    logger.info(f"Replaying {args.path} through {args.cache_type}({args.param})")
+    metrics = replay_trace(
+        args.path,
+        args.cache_type,
+        args.param,
+        prepopulate_cache=args.prepopulate,
+        chunk_size=args.chunk_size,
+        scale_column=args.scale_column,
+        feature_column=args.feature_column,
+        seed=args.seed,
+        logger=logger,
+        costs=costs,
+    )
+    logger.info(
+        f"Free requests: {metrics['requests']:,} of {metrics['num_requests']:,}"
+    )
+    logger.info(
+        f"Free scenes: {metrics['scenes']:,} of {metrics['total_scenes']:,} "
+        f"(ratio {metrics['ratio']:.4f})"
+    )
+    if costs is not None:
+        logger.info(
+            f"Cold reads: {metrics['cold_reads']:,} scenes, "
+            f"{metrics['cold_bytes'] / 1e9:,.1f} GB"
+        )
+        logger.info(
+            f"Bytes moved to hot: {metrics['bytes_moved'] / 1e9:,.1f} GB in "
+            f"{metrics['promotions']:,} promotions"
+        )
+        logger.info(
+            f"Request latency: p50 {metrics['p50_latency']:.2f} s, "
+            f"p99 {metrics['p99_latency']:.2f} s"
+        )
+        logger.info(
+            f"Cost: ${metrics['cost']:,.2f} (retrieval "
+            f"${metrics['retrieval_cost']:,.2f}, egress ${metrics['egress_cost']:,.2f})"
+        )
+    logger.info(f"Replay completed in {(time.time() - init_time):.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
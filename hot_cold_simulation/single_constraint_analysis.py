@@ -8,6 +8,7 @@ import numpy as np
 
 # Third-party imports
 from modules.config import MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.defaults import DEFAULT_BACKEND  # type: ignore
 from modules.linear_combinations import linear_combinations  # type: ignore
 
 # Custom imports
@@ -63,6 +64,9 @@ def run_analysis() -> None:
     num_runs = 32
     prepopulate_cache = True
     return_type = "requests"
+    backend = DEFAULT_BACKEND
+    # Fixed seed, so every cell replays the same streams (common random numbers)
+    seed = 2024
 
     simulator_results = run_simulation(
         num_requests=num_requests,
@@ -72,6 +76,8 @@ def run_analysis() -> None:
         num_runs=num_runs,
         prepopulate_cache=prepopulate_cache,
         return_type=return_type,
+        backend=backend,
+        seed=seed,
     )
     logger.info(f"Analysis completed in {(time.time() - init_time):.2f} seconds")
 
@@ -111,6 +117,8 @@ def run_simulation(
     num_runs,
     prepopulate_cache,
     return_type,
+    backend=DEFAULT_BACKEND,
+    seed=None,
 ):
     simulator_results = {}
     start_time = time.time()
@@ -125,8 +133,9 @@ def run_simulation(
             param=parameter,
             prepopulate_cache=prepopulate_cache,
             return_type=return_type,
+            backend=backend,
         )
-        results = simulator.monte_carlo_simulation(num_runs)
+        results = simulator.monte_carlo_simulation(num_runs, seed=seed)
         average_free_requests = sum(results) / num_runs
         free_request_std = np.std(np.array(results))
         weight_results[tuple(weights)] = average_free_requests
@@ -147,4 +156,5 @@ def run_simulation(
     return simulator_results
 
 
-run_analysis()
+if __name__ == "__main__":
+    run_analysis()
@@ -9,6 +9,7 @@ import matplotlib.pyplot as plt  # type: ignore
 import matplotlib.ticker as ticker
 import numpy as np
 from modules.config import MONTE_CARLO_LOG_DIR  # type: ignore
+from modules.defaults import DEFAULT_BACKEND  # type: ignore
 
 # Custom imports
 from modules.simulator import MonteCarloSimulation  # type: ignore
@@ -63,6 +64,9 @@ def run_analysis(weights) -> dict:
     num_runs = 100
     prepopulate_cache = True
     return_type = "requests"
+    backend = DEFAULT_BACKEND
+    # Fixed seed, so every cell replays the same streams (common random numbers)
+    seed = 2024
 
     simulator_results = run_simulation(
         num_requests=num_requests,
@@ -72,6 +76,8 @@ def run_analysis(weights) -> dict:
         num_runs=num_runs,
         prepopulate_cache=prepopulate_cache,
         return_type=return_type,
+        backend=backend,
+        seed=seed,
     )
     logger.info(f"Analysis completed in {(time.time() - init_time):.2f} seconds")
 
@@ -86,6 +92,8 @@ def run_simulation(
     num_runs,
     prepopulate_cache,
     return_type,
+    backend=DEFAULT_BACKEND,
+    seed=None,
 ):
     parameter_results = {}
     for ijx, parameter in enumerate(parameters_list, start=1):
@@ -99,8 +107,9 @@ def run_simulation(
             param=parameter,
             prepopulate_cache=prepopulate_cache,
             return_type=return_type,
+            backend=backend,
         )
-        results = simulator.monte_carlo_simulation(num_runs)
+        results = simulator.monte_carlo_simulation(num_runs, seed=seed)
         average_free_requests = sum(results) / num_runs
         free_request_std = np.std(np.array(results))
         free_request_sem = free_request_std / np.sqrt(num_runs)
@@ -259,4 +268,5 @@ def multiplot_Combination():
     plt.show()
 
 
-multiplot_Combination()
+if __name__ == "__main__":
+    multiplot_Combination()
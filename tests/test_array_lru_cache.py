@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+from modules.array_lru_cache import NUM_SCENES, ArrayLRUCache
+from modules.lru_cache import LRUCache
+
+
+@pytest.mark.parametrize("prepopulate", [False, True])
+@pytest.mark.parametrize("capacity", [1, 2, 5, 40, NUM_SCENES])
+def test_matches_lru_cache(capacity, prepopulate):
+    rng = np.random.default_rng(capacity)
+    caches = [
+        cache_class(capacity, prepopulate, np.random.default_rng(0))
+        for cache_class in (LRUCache, ArrayLRUCache)
+    ]
+    for _ in range(300):
+        # Small key ranges and long batches repeat keys within a put
+        keys = rng.integers(0, rng.choice([8, 60, NUM_SCENES]), rng.integers(1, 80))
+        hits = [[cache.get(key) for key in keys.tolist()] for cache in caches]
+        assert hits[0] == hits[1]
+        for cache in caches:
+            cache.put(keys.tolist())
+        assert caches[0].current_state() == caches[1].current_state()
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+from modules.batched_engine import BatchedEngine
+from modules.compiled_engine import POLICIES, CompiledEngine, check_parity
+from modules.scenario import load_scenario_data
+from modules.simulator import MonteCarloSimulation
+
+DICTIONARIES = Path(__file__).resolve().parents[1] / "dictionaries"
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    return load_scenario_data(str(DICTIONARIES))
+
+
+@pytest.mark.parametrize("engine_class", [CompiledEngine, BatchedEngine])
+@pytest.mark.parametrize("prepopulate_cache", [False, True])
+@pytest.mark.parametrize("cache_type", sorted(POLICIES))
+def test_check_parity(scenario, cache_type, prepopulate_cache, engine_class):
+    simulator = MonteCarloSimulation(
+        weights=[0.3, 0.4, 0.3],
+        num=200,
+        cache_type=cache_type,
+        param=100,
+        prepopulate_cache=prepopulate_cache,
+        backend="serial",
+        scenario=scenario,
+    )
+    engine = engine_class(scenario.footprints, cache_type, 100, prepopulate_cache)
+    assert check_parity(simulator, num_runs=4, seed=2024, engine=engine)
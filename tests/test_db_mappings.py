@@ -0,0 +1,90 @@
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pytest
+from modules.db_mappings import (
+    load_scenario_data_from_database,
+    read_footprint_index,
+    write_mappings,
+)
+from modules.scenario import load_scenario_data
+from modules.workload import SCALES
+
+DICTIONARIES = Path(__file__).resolve().parents[1] / "dictionaries"
+
+# Connection of a throwaway PostgreSQL database, e.g. TEST_DB_NAME=postgres and
+# TEST_DB_HOST=localhost. Unset parameters fall back to the libpq defaults.
+TEST_DB = {
+    "dbname": os.getenv("TEST_DB_NAME"),
+    "user": os.getenv("TEST_DB_USER"),
+    "password": os.getenv("TEST_DB_PASS"),
+    "host": os.getenv("TEST_DB_HOST"),
+    "port": os.getenv("TEST_DB_PORT"),
+}
+
+
+@pytest.fixture
+def conn():
+    if TEST_DB["dbname"] is None:
+        pytest.skip("TEST_DB_NAME does not name a throwaway PostgreSQL database")
+    psycopg2 = pytest.importorskip("psycopg2")
+    from modules.db_connect import connect
+
+    try:
+        conn = connect(**TEST_DB)
+    except psycopg2.OperationalError as error:
+        pytest.skip(f"No PostgreSQL database available: {error}")
+
+    # Every test writes its tables into a schema of its own, dropped afterwards
+    schema = f"test_{uuid.uuid4().hex}"
+    with conn, conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+    yield conn
+    conn.rollback()
+    with conn, conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    conn.close()
+
+
+def to_mapping(index):
+    return {feature: index[feature].tolist() for feature in range(len(index))}
+
+
+def test_round_trip_of_every_scale(conn):
+    footprints = load_scenario_data(str(DICTIONARIES)).footprints
+    mappings = {
+        f"{scale}_mapping": to_mapping(index)
+        for scale, index in zip(SCALES, footprints)
+    }
+    write_mappings(conn, mappings)
+    # Loading the same mappings again leaves the tables unchanged
+    write_mappings(conn, mappings)
+
+    scenario = load_scenario_data_from_database(conn)
+    for written, read in zip(footprints, scenario.footprints):
+        np.testing.assert_array_equal(read.offsets, written.offsets)
+        np.testing.assert_array_equal(read.scenes, written.scenes)
+
+
+def test_empty_footprints_and_feature_order(conn):
+    write_mappings(conn, {"features_mapping": {2: [7, 3], 0: [5], 1: []}})
+
+    index = read_footprint_index(conn, "features_mapping")
+    np.testing.assert_array_equal(index.offsets, [0, 1, 1, 3])
+    np.testing.assert_array_equal(index.scenes, [5, 7, 3])
+
+
+def test_failed_write_rolls_back_every_table(conn):
+    mappings = {
+        "first_mapping": {0: [1, 2]},
+        "second_mapping": {0: ["not a scene"]},
+    }
+    with pytest.raises(Exception, match="invalid input syntax"):
+        write_mappings(conn, mappings)
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('first_mapping')")
+        assert cursor.fetchone()[0] is None
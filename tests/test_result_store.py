@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+from modules.result_store import ResultStore
+
+
+def test_standard_error_uses_sample_deviation(tmp_path):
+    store = ResultStore(tmp_path / "results.sqlite", {"num_requests": 10})
+    store.append_cell(100, (0.5, 0.5, 0.0), [1.0, 2.0, 3.0, 6.0])
+    store.append_cell(200, (0.5, 0.5, 0.0), [4.0])
+    frame = store.to_frame().set_index("Parameter")
+    store.close()
+
+    values = np.array([1.0, 2.0, 3.0, 6.0])
+    assert frame.loc[100, "Standard Error"] == pytest.approx(
+        values.std(ddof=1) / np.sqrt(len(values))
+    )
+    assert frame.loc[200, "Standard Error"] == 0.0
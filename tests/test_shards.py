@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from modules.scenario import load_scenario_data
+from modules.shards import (
+    COLD,
+    RequestStream,
+    sampled_depths,
+    sampled_scenes,
+    t_quantile,
+    validate_miss_ratio_curve,
+)
+from modules.workload import generate_requests
+
+DICTIONARIES = Path(__file__).resolve().parents[1] / "dictionaries"
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    return load_scenario_data(str(DICTIONARIES))
+
+
+def stack_depths(scenes, count, sampled, prepopulate_order):
+    """Depths of the sampled accesses from an explicit recency stack, most recent first."""
+    stack = [scene for scene in prepopulate_order if sampled[scene]]
+    depths = []
+    begin = 0
+    for length in count:
+        requested = [
+            scene for scene in scenes[begin : begin + length] if sampled[scene]
+        ]
+        depths += [
+            stack.index(scene) + 1 if scene in stack else COLD for scene in requested
+        ]
+        for scene in requested:
+            if scene in stack:
+                stack.remove(scene)
+            stack.insert(0, scene)
+        begin += length
+    return depths
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize("prepopulate", [False, True])
+def test_sampled_depths(scenario, compiled, prepopulate):
+    scales, features = generate_requests(
+        np.random.default_rng(2), [0.3, 0.4, 0.3], scenario.feature_counts, 300
+    )
+    masks = np.array([sampled_scenes(0.1, salt) for salt in range(3)])
+    order = np.random.default_rng(3).permutation(886)[:300] if prepopulate else []
+    depths, total = sampled_depths(
+        scenario.footprints,
+        scales,
+        features,
+        masks,
+        order if prepopulate else None,
+        chunk_size=64,
+        compiled=compiled,
+    )
+    scenes, count = RequestStream(scenario.footprints).expand(scales, features)
+    assert total == len(scenes)
+    for depth, sampled in zip(depths, masks):
+        assert depth.tolist() == stack_depths(scenes.tolist(), count, sampled, order)
+
+
+@pytest.mark.parametrize(
+    "df, quantile", [(1, 12.7062), (2, 4.3027), (3, 3.1824), (7, 2.3646)]
+)
+def test_t_quantile(df, quantile):
+    assert t_quantile(0.975, df) == pytest.approx(quantile, abs=0.01)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize(
+    "weights", [[0.05, 0.15, 0.8], [0.3, 0.4, 0.3], [0.8, 0.15, 0.05]]
+)
+def test_miss_ratio_curve_bounds(scenario, weights, seed):
+    scales, features = generate_requests(
+        np.random.default_rng(seed), weights, scenario.feature_counts, 2000
+    )
+    result = validate_miss_ratio_curve(
+        scenario.footprints, scales, features, np.arange(1, 887, 5), rate=0.1
+    )
+    assert result["coverage"] >= 0.9
+    assert result["mean_abs_error"] < 0.02
@@ -0,0 +1,54 @@
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pytest
+from modules.scenario import load_scenario_data
+from modules.sweep import run_sequential_sweep
+
+DICTIONARIES = Path(__file__).resolve().parents[1] / "dictionaries"
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    return load_scenario_data(str(DICTIONARIES))
+
+
+def sequential_sweep(scenario, **kwargs):
+    return run_sequential_sweep(
+        num_requests=50,
+        weights_list=[[0.3, 0.4, 0.3], [0.1, 0.1, 0.8]],
+        cache_type="LRUCache",
+        param_list=[100, 200],
+        ci_width=1.0,
+        backend="serial",
+        seed=2024,
+        scenario=scenario,
+        **kwargs,
+    )
+
+
+def test_single_run_cells_stop_without_warnings(scenario):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        results = sequential_sweep(scenario, max_runs=1, min_runs=1, batch_runs=1)
+    assert len(results) == 4
+    assert all(len(values) == 1 for values in results.values())
+
+
+def test_cells_never_exceed_max_runs(scenario):
+    results = sequential_sweep(scenario, max_runs=12, min_runs=4, batch_runs=4)
+    assert all(4 <= len(values) <= 12 for values in results.values())
+    assert all(np.isfinite(values).all() for values in results.values())
+
+
+@pytest.mark.parametrize(
+    "runs",
+    [
+        {"max_runs": 8, "min_runs": 4, "batch_runs": 0},
+        {"max_runs": 4, "min_runs": 8, "batch_runs": 4},
+    ],
+)
+def test_invalid_run_counts(scenario, runs):
+    with pytest.raises(ValueError):
+        sequential_sweep(scenario, **runs)
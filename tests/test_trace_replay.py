@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from modules.scenario import load_scenario_data
+from modules.simulator import MonteCarloSimulation
+from modules.trace_replay import replay_trace
+from modules.workload import SCALES, generate_requests
+
+DICTIONARIES = Path(__file__).resolve().parents[1] / "dictionaries"
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    return load_scenario_data(str(DICTIONARIES))
+
+
+@pytest.mark.parametrize("cache_type", ["LRUCache", "BeladyCache"])
+def test_chunked_replay_matches_whole_trace(tmp_path, scenario, cache_type):
+    scales, features = generate_requests(
+        np.random.default_rng(7), [0.2, 0.3, 0.5], scenario.feature_counts, 500
+    )
+    path = tmp_path / "trace.csv"
+    pd.DataFrame(
+        {"scale": [SCALES[scale] for scale in scales], "feature": features}
+    ).to_csv(path, index=False)
+
+    simulator = MonteCarloSimulation(
+        weights=[],
+        num=0,
+        cache_type=cache_type,
+        param=100,
+        backend="serial",
+        scenario=scenario,
+    )
+    expected = simulator.replay_requests(simulator.create_cache(), scales, features)
+    metrics = replay_trace(
+        path, cache_type, 100, chunk_size=64, seed=0, scenario=scenario
+    )
+    assert metrics["num_requests"] == len(scales)
+    assert (metrics["requests"], metrics["scenes"], metrics["total_scenes"]) == expected